@@ -5,8 +5,11 @@ mog (My Own Game-Maker-Language) is a little experiment into producing GML code
 
 
 import argparse
+import concurrent.futures
+import functools
 import mog
 import os
+import sys
 
 
 def main():
@@ -61,33 +64,133 @@ def mog_build(args):
     project = mog.project.Project(base_path)
     project_name = project.project_file.project_name
     parser_success = True
+    timings = mog.timing.Timings()
 
     gm_project = mog.gamemaker.project.Project(project.project_file.gamemaker_project_path)
     transpiler = mog.transpiler.Transpiler(project_name)
-    for filename in filter(lambda x: x.endswith(".mog"), os.listdir(base_path)):
-        filepath = os.path.join(base_path, filename)
-        parse_result = mog.source.parser.parse(open(filepath, 'r'), filename)
-        print("  ast:")
-        print(parse_result.ast.pretty_print(4, 1))
+    parse_cache = project.parse_cache if args.cache else None
+    if parse_cache is not None:
+        parse_function = parse_cache.parse_text
+    else:
+        parse_function = mog.source.parser.parse_text
+
+    filenames = sorted(filter(lambda x: x.endswith(".mog"), os.listdir(base_path)))
+    filepaths = [os.path.join(base_path, filename) for filename in filenames]
+    parse_results = parse_files(parse_function, filepaths, filenames, args.jobs, args.timings is not None)
+    for filename, (parse_result, file_timings) in zip(filenames, parse_results):
+        timings.merge(file_timings, filename)
+        with timings.phase('ast-output'):
+            if args.ast_format == 'text':
+                print("  ast:")
+                mog.source.serializer.dump_text(parse_result.ast, sys.stdout, 4, 1)
+            elif args.ast_format == 'json':
+                mog.source.serializer.dump_json_lines(parse_result.ast, sys.stdout)
         for message in parse_result.messages:
             print("  parser - {}".format(message))
         if parse_result.is_success():
-            transpiler.ingest_ast(parse_result.ast)
+            with timings.phase('type-identification'):
+                transpiler.ingest_ast(parse_result.ast)
         else:
             parser_success = False
 
-    transpiler.compile(gm_project)
+    if parse_cache is not None:
+        with timings.phase('cache-eviction'):
+            parse_cache.evict()
+
+    build_state = project.build_state if args.cache else None
+    previous_graph = build_state.load() if build_state is not None else None
+    transpiler.compile(gm_project, previous_graph, args.jobs, args.opt_level, timings)
     for message in transpiler.messages:
         print("  compiler - {}".format(message))
+    print("  regenerated {} object(s): {}".format(
+        len(transpiler.compiled_objects), ", ".join(transpiler.compiled_objects)
+    ))
 
     transpiler.debug_types()
 
     if parser_success and transpiler.is_success():
         # print("build success")
-        pass
+        if build_state is not None:
+            build_state.save(transpiler.dependency_graph)
     else:
+        if build_state is not None:
+            build_state.clear()
         print("build unsuccessful")
 
+    if args.timings is not None:
+        timings.stop()
+        timings.save(args.timings)
+
+
+def mog_bench(args):
+    """handles the `mog bench` command"""
+
+    benchmark = mog.source.benchmark
+    settings = benchmark.DEFAULT_SETTINGS._replace(
+        members=args.members, methods=args.methods, events=args.events,
+        statements=args.statements, depth=args.depth
+    )
+    report = benchmark.run(
+        args.sizes, settings, seed=args.seed, repeats=args.repeats,
+        measure_memory=args.memory, label=args.label
+    )
+
+    for result in report['results']:
+        if result['peak_memory_bytes'] is None:
+            memory = ""
+        else:
+            memory = ", peak memory {:.1f} MiB".format(result['peak_memory_bytes'] / (1024 * 1024))
+        print("  {} chars, {} nodes: {:.3f}s, {:.0f} chars/s, {:.0f} nodes/s{}".format(
+            result['chars'], result['nodes'], result['seconds'],
+            result['chars_per_second'], result['nodes_per_second'], memory
+        ))
+
+    if args.baseline is not None:
+        for size, ratio in benchmark.compare(report, benchmark.load(args.baseline)):
+            print("  {} chars: {:.2f}x baseline throughput".format(size, ratio))
+
+    if args.output is not None:
+        benchmark.save(report, args.output)
+
+
+def read_and_parse(parse_function, count_nodes, filepath, filename):
+    """
+    reads and parses a file with parse_function(text, filename), returning the result along with the timings of
+    the reading and parsing phases, counting the characters read and, if count_nodes, the nodes parsed
+    """
+
+    file_timings = mog.timing.Timings()
+    with file_timings.phase('reading'):
+        with open(filepath, 'r') as file:
+            text = file.read()
+    file_timings.count('reading', 'characters', len(text))
+    with file_timings.phase('parsing'):
+        result = parse_function(text, filename)
+    file_timings.count('parsing', 'files')
+    if count_nodes:
+        file_timings.count('parsing', 'nodes', mog.source.benchmark.count_nodes(result.ast))
+    return result, file_timings
+
+
+def parse_files(parse_function, filepaths, filenames, jobs, count_nodes=False):
+    """
+    reads and parses each file, across a pool of jobs worker processes if jobs > 1, returning (result, timings)
+    pairs in the given order
+    """
+
+    parse_file = functools.partial(read_and_parse, parse_function, count_nodes)
+    if jobs > 1 and len(filepaths) > 1:
+        with concurrent.futures.ProcessPoolExecutor(jobs) as pool:
+            return list(pool.map(parse_file, filepaths, filenames))
+    return list(map(parse_file, filepaths, filenames))
+
+
+def job_count(value):
+    jobs = int(value)
+    if jobs < 0:
+        raise argparse.ArgumentTypeError("job count cannot be negative")
+    return jobs or os.cpu_count() or 1
+
 
 def parse_args():
     """configures the argument parser and parses the command line arguments"""
@@ -133,8 +236,53 @@ def parse_args():
         '--path', default='.',
         help='the path of the directory containing the mog project'
     )
+    parser_build.add_argument(
+        '--no-cache', dest='cache', action='store_false',
+        help='parse and regenerate every file from scratch, without reading or writing the parse cache or build state'
+    )
+    parser_build.add_argument(
+        '--jobs', '-j', type=job_count, default=1, metavar='N',
+        help='the number of worker processes to parse and generate code with, 0 for one per CPU, defaults to 1'
+    )
+    parser_build.add_argument(
+        '--opt-level', '-O', type=int, default=mog.transpiler.DEFAULT_OPT_LEVEL, metavar='LEVEL',
+        help='how much optimization to do, 0 for none, defaults to {}'.format(mog.transpiler.DEFAULT_OPT_LEVEL)
+    )
+    parser_build.add_argument(
+        '--ast-format', choices=['text', 'json', 'none'], default='text',
+        help='how to print the ast of each file, as an indented dump, as JSON lines, or not at all'
+    )
+    parser_build.add_argument(
+        '--timings', metavar='FILE',
+        help='write the wall clock and CPU time, and counters, of each build phase (and each file and object) '
+             'to FILE as JSON'
+    )
     parser_build.set_defaults(func=mog_build)
 
+    # mog bench
+    parser_bench = subparsers.add_parser(
+        'bench', help='benchmarks the parser on a generated corpus'
+    )
+    parser_bench.add_argument(
+        '--sizes', type=lambda x: [mog.source.benchmark.parse_size(size) for size in x.split(',')],
+        default='1K,64K,1M', help='comma separated corpus sizes to benchmark, e.g. 1K,64K,1M,100M'
+    )
+    parser_bench.add_argument('--members', type=int, default=6, help='maximum members per object')
+    parser_bench.add_argument('--methods', type=int, default=3, help='maximum methods per object')
+    parser_bench.add_argument('--events', type=int, default=3, help='maximum events per object')
+    parser_bench.add_argument('--statements', type=int, default=6, help='maximum statements per code block')
+    parser_bench.add_argument('--depth', type=int, default=4, help='maximum expression nesting depth')
+    parser_bench.add_argument('--seed', type=int, default=0, help='seed for the corpus generator')
+    parser_bench.add_argument('--repeats', type=int, default=3, help='timed parses per size, the fastest is kept')
+    parser_bench.add_argument(
+        '--no-memory', dest='memory', action='store_false',
+        help='skip the (slow) traced parse that measures peak memory'
+    )
+    parser_bench.add_argument('--label', help='a label for this run, such as the revision being measured')
+    parser_bench.add_argument('--output', help='a JSON file to save the results to')
+    parser_bench.add_argument('--baseline', help='a JSON file of earlier results to compare throughput against')
+    parser_bench.set_defaults(func=mog_bench)
+
     # go go go
     return parser.parse_args()
 
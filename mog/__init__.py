@@ -10,3 +10,4 @@ from . import project
 from . import gamemaker
 from . import source
 from . import transpiler
+from . import timing
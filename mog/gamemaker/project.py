@@ -13,16 +13,39 @@ class Project(object):
     def __init__(self, base_path):
         self._base_path = base_path
         self._contents = etree.parse(Project.path_from_base(self._base_path))
+        self._object_elements = None
 
     @property
     def objects(self):
         return list(map(lambda x: GameObject.from_xml_element(self._base_path, x), self._fetch_assets(".//object")))
 
+    def _object_element(self, name):
+        if self._object_elements is None:
+            self._object_elements = {}
+            for elem in self._fetch_assets(".//object"):
+                self._object_elements.setdefault(os.path.split(elem.text)[-1], elem)
+        return self._object_elements.get(name)
+
+    @property
+    def base_path(self):
+        return self._base_path
+
+    def object_path(self, name):
+        """the path of the object file of the named object, or None if the project has no such object"""
+        elem = self._object_element(name)
+        if elem is None:
+            return None
+        return os.path.join(self._base_path, elem.text) + ".object.gmx"
+
+    def has_object(self, name):
+        path = self.object_path(name)
+        return path is not None and os.path.exists(path)
+
     def fetch_object(self, name):
-        for obj in self.objects:
-            if obj.name == name:
-                return obj
-        return None
+        elem = self._object_element(name)
+        if elem is None:
+            return None
+        return GameObject.from_xml_element(self._base_path, elem)
 
     def create_or_fetch_object(self, name):
         result = self.fetch_object(name)
@@ -55,6 +78,10 @@ class GameObject(object):
     def from_xml_element(base_path, elem):
         path = os.path.join(base_path, elem.text) + ".object.gmx"
         name = os.path.split(elem.text)[-1]
+        return GameObject.from_path(name, path)
+
+    @staticmethod
+    def from_path(name, path):
         return GameObject(name, path, etree.parse(path))
 
     @staticmethod
@@ -71,7 +98,6 @@ class GameObject(object):
                 <parentName>&lt;undefined&gt;</parentName>
                 <maskName>&lt;undefined&gt;</maskName>
                 <events>
-                </event>
                 </events>
                 <PhysicsObject>0</PhysicsObject>
                 <PhysicsObjectSensor>0</PhysicsObjectSensor>
@@ -87,7 +113,7 @@ class GameObject(object):
                 <PhysicsShapePoints/>
             </object>
         """)
-        return GameObject(name, path, object_element)
+        return GameObject(name, path, etree.ElementTree(object_element))
 
     @property
     def events(self):
@@ -108,10 +134,12 @@ class GameObject(object):
         return event
 
     def save(self):
+        """writes the object's XML back to its file, returning the number of characters written"""
         root_obj = self._contents.getroot()
-        if root_obj is not None:
-            with open(self._path, 'w') as handle:
-                handle.write(etree.tostring(root_obj).decode())
+        if root_obj is None:
+            return 0
+        with open(self._path, 'w') as handle:
+            return handle.write(etree.tostring(root_obj).decode())
 
     @property
     def name(self):
@@ -267,6 +295,20 @@ EVENT_TYPE_MAPPING = {
 }
 
 
+# the variables game maker gives every instance, setting one of them does something whether or not any code reads it
+BUILT_IN_INSTANCE_VARIABLES = frozenset([
+    'id', 'object_index', 'persistent', 'solid', 'visible', 'depth', 'alarm',
+    'x', 'y', 'xstart', 'ystart', 'xprevious', 'yprevious',
+    'direction', 'speed', 'hspeed', 'vspeed', 'friction', 'gravity', 'gravity_direction',
+    'path_index', 'path_position', 'path_positionprevious', 'path_speed', 'path_scale', 'path_orientation',
+    'path_endaction',
+    'timeline_index', 'timeline_position', 'timeline_speed', 'timeline_running', 'timeline_loop',
+    'sprite_index', 'sprite_width', 'sprite_height', 'sprite_xoffset', 'sprite_yoffset',
+    'image_number', 'image_index', 'image_speed', 'image_xscale', 'image_yscale', 'image_angle', 'image_alpha',
+    'image_blend', 'mask_index', 'bbox_left', 'bbox_right', 'bbox_top', 'bbox_bottom',
+])
+
+
 def event_type_string(event_type):
     """Returns a string describing the event type integer"""
     return EVENT_TYPE_MAPPING[event_type]
@@ -4,8 +4,13 @@ this package provides the general "project management" functionality within mog
 
 
 import datetime
+import hashlib
+import io
 import json
 import os
+import pickle
+from ..source import parser
+from ..transpiler import dependencies
 
 
 class Project(object):
@@ -20,6 +25,14 @@ class Project(object):
     def project_file(self):
         return self._projectfile
 
+    @property
+    def parse_cache(self):
+        return ParseCache(ParseCache.path_from_base(self._basepath))
+
+    @property
+    def build_state(self):
+        return BuildState(BuildState.path_from_base(self._basepath))
+
     @staticmethod
     def already_exists(path):
         if os.path.isdir(path) and ProjectFile.exists_within(path):
@@ -80,3 +93,148 @@ class ProjectFile(object):
     def save_to(self, filepath):
         with open(filepath, 'w') as file:
             json.dump(self._blob, file)
+
+
+class ParseCache(object):
+    """
+    Caches parser results in the mog project directory, keyed by a hash of the file name, its contents and
+    the parser version
+
+    entries are evicted least recently used first once the cache grows past max_size bytes, entries written by
+    other parser versions can never be hit again so they are always evicted first
+    """
+
+    DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, path, max_size=DEFAULT_MAX_SIZE):
+        self._path = path
+        self._max_size = max_size
+
+    @property
+    def path(self):
+        return self._path
+
+    @staticmethod
+    def path_from_base(basepath):
+        return os.path.join(basepath, ".mog-cache")
+
+    @staticmethod
+    def _version_prefix():
+        return "v{}-".format(parser.PARSER_VERSION)
+
+    @staticmethod
+    def key(filename, text):
+        digest = hashlib.sha256()
+        digest.update(filename.encode())
+        digest.update(b"\0")
+        digest.update(text.encode())
+        return ParseCache._version_prefix() + digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self._path, key + ".result")
+
+    def _latest_path(self, filename):
+        digest = hashlib.sha256(filename.encode()).hexdigest()
+        return os.path.join(self._path, ParseCache._version_prefix() + digest + ".latest")
+
+    def load(self, key):
+        """returns the cached parser result for key, or None"""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'rb') as file:
+                result = pickle.load(file)
+            os.utime(entry_path)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            result = None
+        return result
+
+    def _write_atomically(self, path, contents):
+        temporary_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(temporary_path, 'wb') as file:
+            file.write(contents)
+        os.replace(temporary_path, path)
+
+    def previous(self, filename):
+        """returns the most recently stored parser result for filename (whatever its contents were), or None"""
+        try:
+            with open(self._latest_path(filename), 'r') as file:
+                key = file.read().strip()
+        except OSError:
+            return None
+        return self.load(key)
+
+    def store(self, key, filename, result):
+        os.makedirs(self._path, exist_ok=True)
+        self._write_atomically(self._entry_path(key), pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+        self._write_atomically(self._latest_path(filename), key.encode())
+
+    def parse_text(self, text, filename):
+        """
+        parses the already read contents of a mog file, reusing a cached result for it, or incrementally updating
+        its previous result
+        """
+        key = self.key(filename, text)
+        result = self.load(key)
+        if result is None:
+            previous = self.previous(filename)
+            if previous is None:
+                result = parser.parse(io.StringIO(text), filename)
+            else:
+                result = parser.reparse(previous, io.StringIO(text), filename)
+            self.store(key, filename, result)
+        return result
+
+    def evict(self):
+        """removes entries from other parser versions, then the least recently used ones until under max_size"""
+        if not os.path.isdir(self._path):
+            return
+        entries = []
+        for name in os.listdir(self._path):
+            entry_path = os.path.join(self._path, name)
+            if not name.startswith(ParseCache._version_prefix()):
+                os.remove(entry_path)
+            elif name.endswith(".result"):
+                stat = os.stat(entry_path)
+                entries.append((stat.st_mtime, stat.st_size, entry_path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total <= self._max_size:
+                break
+            os.remove(entry_path)
+            total -= size
+
+
+class BuildState(object):
+    """
+    Keeps the dependency graph of the last successful build in the mog project directory, so the next build
+    only regenerates the objects affected by what changed in between
+    """
+
+    def __init__(self, path):
+        self._path = path
+
+    @property
+    def path(self):
+        return self._path
+
+    @staticmethod
+    def path_from_base(basepath):
+        return os.path.join(basepath, ".mog-build")
+
+    def load(self):
+        """returns the dependency graph of the last successful build, or None"""
+        try:
+            with open(self._path, 'r') as file:
+                return dependencies.DependencyGraph.from_json(json.load(file))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def save(self, graph):
+        temporary_path = "{}.{}.tmp".format(self._path, os.getpid())
+        with open(temporary_path, 'w') as file:
+            json.dump(graph.to_json(), file, indent=1, sort_keys=True)
+        os.replace(temporary_path, self._path)
+
+    def clear(self):
+        if os.path.exists(self._path):
+            os.remove(self._path)
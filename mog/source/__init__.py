@@ -3,5 +3,10 @@ this package provides the the custom language parsing and generation within mog
 """
 
 from . import ast
+from . import lexer
+from . import symbols
 from . import parser
+from . import arena
+from . import serializer
 from . import generator
+from . import benchmark
@@ -0,0 +1,273 @@
+"""
+this module provides a flat, array backed representation of the abstract syntax tree for mog's custom language
+"""
+
+
+from array import array
+from . import ast
+from . import source
+
+
+NO_NODE = -1
+
+
+class NodeView(object):
+    """
+    a thin view of a single node in an arena
+
+    each node class gets a view class of its own (see AstArena.view_class), carrying copies of the node class's
+    properties, so a view answers the same questions as the node it was built from (name, code_block, condition,
+    ...) while all of its state stays in the arena's columns
+    """
+
+    __slots__ = ('_arena', '_index')
+
+    def __init__(self, arena, index):
+        self._arena = arena
+        self._index = index
+
+    @property
+    def arena(self):
+        return self._arena
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def node_class(self):
+        return self._arena.node_class(self._index)
+
+    @property
+    def origin(self):
+        return self._arena.origin(self._index)
+
+    @property
+    def parent(self):
+        return self._arena.view(self._arena.parents[self._index])
+
+    @property
+    def children(self):
+        return [self._arena.view(index) for index in self._arena.iter_children(self._index)]
+
+    def __eq__(self, other):
+        return isinstance(other, NodeView) and other._arena is self._arena and other._index == self._index
+
+    def __hash__(self):
+        return hash(self._index)
+
+    pretty_print = ast.Node.pretty_print
+
+
+def _payload_property(position):
+    return property(lambda view: view._arena.payload(view._index)[position])
+
+
+class AstArena(object):
+    """
+    an abstract syntax tree held in parallel arrays, one entry per node, rather than as a tree of Node objects
+
+    nodes are stored in pre-order, so the subtree of a node is a contiguous run of entries and a whole tree pass
+    is a walk along the arrays. for each node the columns hold its kind (an index into the node classes), its
+    parent, first child and next sibling (NO_NODE where there are none), the index of the source its origin is in
+    and the origin's offset, and the index of its payload: the tuple of the node's own attributes (names, operators
+    and the like), deduplicated across the arena since so many nodes carry the same ones
+    """
+
+    def __init__(self):
+        self._kinds = array('H')
+        self._parents = array('i')
+        self._first_children = array('i')
+        self._next_siblings = array('i')
+        self._sources = array('I')
+        self._offsets = array('q')
+        self._payload_indices = array('i')
+
+        self._node_classes = []
+        self._kind_of_class = {}
+        self._payload_attributes = []
+        self._view_classes = []
+        self._payloads = []
+        self._payload_index = {}
+        self._lines = []
+        self._lines_index = {}
+
+    @property
+    def kinds(self):
+        return self._kinds
+
+    @property
+    def parents(self):
+        return self._parents
+
+    @property
+    def first_children(self):
+        return self._first_children
+
+    @property
+    def next_siblings(self):
+        return self._next_siblings
+
+    @property
+    def offsets(self):
+        return self._offsets
+
+    @property
+    def payload_indices(self):
+        return self._payload_indices
+
+    def __len__(self):
+        return len(self._kinds)
+
+    def _add_kind(self, node):
+        node_class = type(node)
+        kind = len(self._node_classes)
+        self._kind_of_class[node_class] = kind
+        self._node_classes.append(node_class)
+        self._payload_attributes.append(tuple(
+            attribute for attribute in node.__dict__ if attribute not in ast.STRUCTURAL_ATTRIBUTES
+        ))
+        self._view_classes.append(None)
+        return kind
+
+    def _intern_payload(self, payload):
+        index = self._payload_index.get(payload)
+        if index is None:
+            index = len(self._payloads)
+            self._payload_index[payload] = index
+            self._payloads.append(payload)
+        return index
+
+    def _intern_lines(self, lines):
+        index = self._lines_index.get(lines)
+        if index is None:
+            index = len(self._lines)
+            self._lines_index[lines] = index
+            self._lines.append(lines)
+        return index
+
+    @staticmethod
+    def from_tree(root):
+        """builds the arena for the tree under root (a Node)"""
+        arena = AstArena()
+        kinds = arena._kinds
+        parents = arena._parents
+        sources = arena._sources
+        offsets = arena._offsets
+        payload_indices = arena._payload_indices
+        payload_attributes = arena._payload_attributes
+        kind_of_class = arena._kind_of_class
+        intern_payload = arena._intern_payload
+        intern_lines = arena._intern_lines
+
+        stack = [(root, NO_NODE)]
+        while len(stack) > 0:
+            node, parent_index = stack.pop()
+            kind = kind_of_class.get(type(node))
+            if kind is None:
+                kind = arena._add_kind(node)
+            state = node.__dict__
+            origin = state['_origin']
+            index = len(kinds)
+            kinds.append(kind)
+            parents.append(parent_index)
+            sources.append(intern_lines(origin.lines))
+            offsets.append(origin.offset)
+            payload_indices.append(intern_payload(tuple([state[attribute] for attribute in payload_attributes[kind]])))
+            children = state['_children']
+            for child_index in range(len(children) - 1, -1, -1):
+                stack.append((children[child_index], index))
+
+        # walking backwards over a pre-order, each node is met before its earlier siblings, so pushing it onto the
+        # front of its parent's child list links every child list up in order
+        count = len(kinds)
+        first_children = arena._first_children = array('i', [NO_NODE]) * count
+        next_siblings = arena._next_siblings = array('i', [NO_NODE]) * count
+        for index in range(count - 1, 0, -1):
+            parent_index = parents[index]
+            next_siblings[index] = first_children[parent_index]
+            first_children[parent_index] = index
+        return arena
+
+    def node_class(self, index):
+        return self._node_classes[self._kinds[index]]
+
+    def payload(self, index):
+        return self._payloads[self._payload_indices[index]]
+
+    def origin(self, index):
+        return source.SourcePoint(self._lines[self._sources[index]], self._offsets[index])
+
+    def iter_children(self, index):
+        child = self._first_children[index]
+        while child != NO_NODE:
+            yield child
+            child = self._next_siblings[child]
+
+    def subtree_end(self, index):
+        """the index just past the last node of the subtree under index"""
+        while index != NO_NODE:
+            sibling = self._next_siblings[index]
+            if sibling != NO_NODE:
+                return sibling
+            index = self._parents[index]
+        return len(self._kinds)
+
+    def subtree(self, index=0):
+        """the indices of the subtree under index, in pre-order"""
+        return range(index, self.subtree_end(index))
+
+    def find(self, node_class, index=0):
+        """yields views of the nodes in the subtree under index that are instances of node_class, in pre-order"""
+        kinds = {
+            kind
+            for kind, candidate in enumerate(self._node_classes)
+            if issubclass(candidate, node_class)
+        }
+        arena_kinds = self._kinds
+        for node in self.subtree(index):
+            if arena_kinds[node] in kinds:
+                yield self.view(node)
+
+    def view_class(self, kind):
+        """the view class for the given kind, built from the properties of its node class the first time"""
+        view_class = self._view_classes[kind]
+        if view_class is None:
+            node_class = self._node_classes[kind]
+            namespace = {'__slots__': ()}
+            for klass in reversed(node_class.__mro__):
+                if klass is object or klass is ast.Node:
+                    continue
+                for name, value in vars(klass).items():
+                    if isinstance(value, property) or name == '__str__':
+                        namespace[name] = value
+            for position, attribute in enumerate(self._payload_attributes[kind]):
+                namespace[attribute] = _payload_property(position)
+            view_class = type(node_class.__name__ + 'View', (NodeView,), namespace)
+            self._view_classes[kind] = view_class
+        return view_class
+
+    def view(self, index):
+        if index == NO_NODE:
+            return None
+        return self.view_class(self._kinds[index])(self, index)
+
+    @property
+    def root(self):
+        return self.view(0) if len(self._kinds) > 0 else None
+
+    def to_tree(self, index=0):
+        """rebuilds the Node tree for the subtree under index"""
+        nodes = []
+        for node_index in self.subtree(index):
+            kind = self._kinds[node_index]
+            node_class = self._node_classes[kind]
+            node = node_class.__new__(node_class)
+            state = node.__dict__
+            state.update(zip(self._payload_attributes[kind], self._payloads[self._payload_indices[node_index]]))
+            state['_origin'] = source.SourcePoint(self._lines[self._sources[node_index]], self._offsets[node_index])
+            state['_children'] = []
+            nodes.append(node)
+            if node_index != index:
+                nodes[self._parents[node_index] - index]._children.append(node)
+        return nodes[0]
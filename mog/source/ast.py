@@ -4,10 +4,24 @@ this module provides the abstract syntax tree for mog's custom language
 
 
 from . import source
+from . import symbols
+import hashlib
+
+
+# the attributes every node has that are not part of its payload: its position, its children, and the cached
+# structural hash
+STRUCTURAL_ATTRIBUTES = ('_origin', '_children', '_structural_hash')
 
 
 class Node(object):
 
+    # the attributes holding symbol IDs (see mog.source.symbols), these are only meaningful within one process, so
+    # they are pickled (into the parse cache, or back from a worker process) as the names they stand for
+    _symbol_attributes = ()
+
+    # computed on demand, see structural_hash
+    _structural_hash = None
+
     def __init__(self, origin):
         self._origin = origin
         self._children = []
@@ -21,35 +35,219 @@ class Node(object):
         return self._children
 
     def pop(self):
-        result = self._children[-1]
-        self._children = self._children[:-1]
-        return result
+        self._structural_hash = None
+        return self._children.pop()
 
     def pop_many(self, n):
+        self._structural_hash = None
         result = self._children[-n:]
-        self._children = self._children[:-n]
+        del self._children[-n:]
         return result
 
+    def __getstate__(self):
+        if len(self._symbol_attributes) == 0:
+            return self.__dict__
+        state = self.__dict__.copy()
+        for attribute in self._symbol_attributes:
+            state[attribute] = symbols.SYMBOLS.name(state[attribute])
+        return state
+
+    def __setstate__(self, state):
+        for attribute in self._symbol_attributes:
+            state[attribute] = symbols.SYMBOLS.intern(state[attribute])
+        self.__dict__.update(state)
+
+    def __reduce__(self):
+        # pickling the children of each node in turn would take a level of the stack per level of the tree, so the
+        # subtree is pickled as a flat, pre-order list of its nodes instead. nodes of it also referred to from
+        # outside it are copies once unpickled
+        flattened = []
+        stack = [self]
+        while len(stack) > 0:
+            node = stack.pop()
+            state = node.__getstate__().copy()
+            del state['_children']
+            flattened.append((type(node), state, len(node._children)))
+            stack.extend(reversed(node._children))
+        return _unflatten, (flattened,)
+
     def add(self, child):
         if child is not None:
+            self._structural_hash = None
             self._children.append(child)
 
+    def replace(self, index, child):
+        """replaces the child at index, e.g. with a simplified version of it"""
+        self._structural_hash = None
+        self._children[index] = child
+
+    @property
+    def structural_hash(self):
+        """
+        a Merkle style hash (16 bytes) of this subtree, over each node's class, payload and its children's hashes
+
+        source positions do not take part, so two subtrees hash the same exactly when they have the same shape
+        and contents wherever they are. the hash is computed the first time it is asked for and kept on each node
+        of the subtree, adding, replacing or popping children clears a node's own hash but not those of its
+        ancestors, so hashes should only be taken of finished trees. names are hashed as text, not symbol IDs, so
+        hashes can be compared across processes and builds
+        """
+        if self._structural_hash is None:
+            stack = [(self, False)]
+            while len(stack) > 0:
+                node, children_done = stack.pop()
+                if node._structural_hash is not None:
+                    continue
+                if not children_done:
+                    stack.append((node, True))
+                    for child in node._children:
+                        if child._structural_hash is None:
+                            stack.append((child, False))
+                    continue
+                digest = hashlib.blake2b(digest_size=16)
+                digest.update(type(node).__name__.encode('utf-8'))
+                state = node.__getstate__()
+                digest.update(repr([
+                    (attribute, value)
+                    for attribute, value in state.items()
+                    if attribute not in STRUCTURAL_ATTRIBUTES
+                ]).encode('utf-8'))
+                digest.update(len(node._children).to_bytes(4, 'little'))
+                for child in node._children:
+                    digest.update(child._structural_hash)
+                node._structural_hash = digest.digest()
+        return self._structural_hash
+
+    def rebase(self, lines, delta=0):
+        """moves this node and all of its descendants into lines, shifting every offset by delta"""
+        stack = [self]
+        while len(stack) > 0:
+            node = stack.pop()
+            node._origin = source.SourcePoint(lines, node._origin.offset + delta)
+            stack.extend(node._children)
+
+    def detached(self):
+        """
+        a copy of this subtree whose origins are SourceLocations, so that it no longer holds on to the text of its
+        source, e.g. to send it to a worker process. a detached subtree cannot be rebased
+        """
+        copy = None
+        # (node, the copy of its parent)
+        stack = [(self, None)]
+        while len(stack) > 0:
+            node, parent = stack.pop()
+            node_copy = type(node).__new__(type(node))
+            node_copy.__dict__.update(node.__dict__)
+            node_copy._origin = node._origin.location()
+            node_copy._children = []
+            if parent is None:
+                copy = node_copy
+            else:
+                parent._children.append(node_copy)
+            stack.extend((child, node_copy) for child in reversed(node._children))
+        return copy
+
     def pretty_print(self, indent=4, depth=0):
-        result = ""
-        result += "{}[{}:{}] {}".format(
-            indent * depth * " ",
-            self.origin.line, self.origin.column,
-            str(self)
-        )
-        for child in self.children:
-            result += "\n" + child.pretty_print(indent, depth + 1)
-        return result
+        lines = []
+        stack = [(self, depth)]
+        while len(stack) > 0:
+            node, node_depth = stack.pop()
+            lines.append("{}[{}:{}] {}".format(
+                indent * node_depth * " ",
+                node.origin.line, node.origin.column,
+                str(node)
+            ))
+            children = node.children
+            for index in range(len(children) - 1, -1, -1):
+                stack.append((children[index], node_depth + 1))
+        return "\n".join(lines)
+
+
+def _unflatten(flattened):
+    """rebuilds the subtree pickled by Node.__reduce__"""
+    root = None
+    # (node, number of children still to come)
+    stack = []
+    for node_class, state, child_count in flattened:
+        node = node_class.__new__(node_class)
+        state['_children'] = []
+        node.__setstate__(state)
+        if len(stack) > 0:
+            parent, remaining = stack[-1]
+            parent._children.append(node)
+            if remaining == 1:
+                stack.pop()
+            else:
+                stack[-1] = (parent, remaining - 1)
+        else:
+            root = node
+        if child_count > 0:
+            stack.append((node, child_count))
+    return root
+
+
+class Visitor(object):
+    """
+    walks a tree iteratively, in pre-order, dispatching on the class of each node
+
+    subclasses define visit_<class name>(node) methods, called on entering a node, and leave_<class name>(node)
+    methods, called once all of its children have been walked. the handler for a node is the one for the nearest
+    class in its MRO, so visit_LiteralNode also handles NumericLiteralNode and visit_Node handles everything. the
+    handlers for each node class are looked up once per visitor class and kept in a dispatch table. a visit
+    handler returning PRUNE stops the walk from descending into that node's children (its leave handler is still
+    called), and depth is the depth of the current node below the root of the walk
+    """
+
+    PRUNE = object()
+
+    # visitor class -> {node class -> (visit handler, leave handler)}
+    _dispatch_tables = {}
+
+    def __init__(self):
+        self._depth = 0
+
+    @property
+    def depth(self):
+        return self._depth
+
+    @classmethod
+    def _find_handlers(cls, node_class):
+        visit = None
+        leave = None
+        for klass in node_class.__mro__:
+            if visit is None:
+                visit = getattr(cls, "visit_" + klass.__name__, None)
+            if leave is None:
+                leave = getattr(cls, "leave_" + klass.__name__, None)
+        return visit, leave
+
+    def walk(self, root):
+        prune = Visitor.PRUNE
+        table = Visitor._dispatch_tables.setdefault(type(self), {})
+        stack = [(root, 0, False)]
+        while len(stack) > 0:
+            node, depth, leaving = stack.pop()
+            self._depth = depth
+            handlers = table.get(type(node))
+            if handlers is None:
+                handlers = table[type(node)] = self._find_handlers(type(node))
+            visit, leave = handlers
+            if leaving:
+                leave(self, node)
+                continue
+            if leave is not None:
+                stack.append((node, depth, True))
+            if visit is not None and visit(self, node) is prune:
+                continue
+            children = node.children
+            for index in range(len(children) - 1, -1, -1):
+                stack.append((children[index], depth + 1, False))
 
 
 class RootNode(Node):
 
     def __init__(self, source_name):
-        super().__init__(source.SourcePoint(source_name, 0, 0))
+        super().__init__(source.SourceLines(source_name).point(0))
 
     @property
     def source_name(self):
@@ -75,17 +273,27 @@ class CommentNode(Node):
 
 class ObjectNode(Node):
 
+    _symbol_attributes = ('_name', '_parent_name')
+
     def __init__(self, origin, name, parent_name):
         super().__init__(origin)
-        self._name = name
-        self._parent_name = parent_name
+        self._name = symbols.SYMBOLS.intern(name)
+        self._parent_name = symbols.SYMBOLS.intern(parent_name)
 
     @property
     def name(self):
+        return symbols.SYMBOLS.name(self._name)
+
+    @property
+    def name_symbol(self):
         return self._name
 
     @property
     def parent_name(self):
+        return symbols.SYMBOLS.name(self._parent_name)
+
+    @property
+    def parent_name_symbol(self):
         return self._parent_name
 
     def __str__(self):
@@ -98,12 +306,18 @@ class ObjectNode(Node):
 
 class EventNode(Node):
 
+    _symbol_attributes = ('_event_name',)
+
     def __init__(self, origin, event_name):
         super().__init__(origin)
-        self._event_name = event_name
+        self._event_name = symbols.SYMBOLS.intern(event_name)
 
     @property
     def event_name(self):
+        return symbols.SYMBOLS.name(self._event_name)
+
+    @property
+    def event_name_symbol(self):
         return self._event_name
 
     @property
@@ -119,12 +333,18 @@ class EventNode(Node):
 
 class LetNode(Node):
 
+    _symbol_attributes = ('_variable_name',)
+
     def __init__(self, origin, variable_name):
         super().__init__(origin)
-        self._variable_name = variable_name
+        self._variable_name = symbols.SYMBOLS.intern(variable_name)
 
     @property
     def variable_name(self):
+        return symbols.SYMBOLS.name(self._variable_name)
+
+    @property
+    def variable_name_symbol(self):
         return self._variable_name
 
     @property
@@ -147,33 +367,65 @@ class LetNode(Node):
 
 class AssignmentNode(Node):
 
-    def __init__(self, origin, destination):
+    _symbol_attributes = ('_destination',)
+
+    def __init__(self, origin, destination, operator='='):
         super().__init__(origin)
-        self._destination = destination
+        self._destination = symbols.SYMBOLS.intern(destination)
+        self._operator = operator
 
     @property
     def destination(self):
+        return symbols.SYMBOLS.name(self._destination)
+
+    @property
+    def destination_symbol(self):
         return self._destination
 
+    @property
+    def operator(self):
+        return self._operator
+
+    @property
+    def target(self):
+        """the expression assigned to when there is no plain destination name, e.g. a member access"""
+        if self.destination is None and len(self.children) > 1:
+            return self.children[0]
+        else:
+            return None
+
     @property
     def expression(self):
         if len(self.children) > 0:
-            return self.children[0]
+            return self.children[-1]
         else:
             return None
 
     def __str__(self):
-        return "assignment to '{}'".format(self.destination)
+        if self.destination is None:
+            destination = "expression"
+        else:
+            destination = "'{}'".format(self.destination)
+        if self.operator == '=':
+            return "assignment to {}".format(destination)
+        else:
+            return "assignment ({}) to {}".format(self.operator, destination)
 
 
 class FunctionCall(Node):
 
+    _symbol_attributes = ('_function_name',)
+
     def __init__(self, origin, function_name):
         super().__init__(origin)
-        self._function_name = function_name
+        self._function_name = symbols.SYMBOLS.intern(function_name)
 
     @property
     def function_name(self):
+        return symbols.SYMBOLS.name(self._function_name)
+
+    @property
+    def function_name_symbol(self):
         return self._function_name
 
     def __str__(self):
@@ -182,12 +434,18 @@ class FunctionCall(Node):
 
 class IdentifierNode(Node):
 
+    _symbol_attributes = ('_name',)
+
     def __init__(self, origin, name):
         super().__init__(origin)
-        self._name = name
+        self._name = symbols.SYMBOLS.intern(name)
 
     @property
     def name(self):
+        return symbols.SYMBOLS.name(self._name)
+
+    @property
+    def name_symbol(self):
         return self._name
 
     def __str__(self):
@@ -196,12 +454,18 @@ class IdentifierNode(Node):
 
 class TypeNode(Node):
 
+    _symbol_attributes = ('_name',)
+
     def __init__(self, origin, name):
         super().__init__(origin)
-        self._name = name
+        self._name = symbols.SYMBOLS.intern(name)
 
     @property
     def name(self):
+        return symbols.SYMBOLS.name(self._name)
+
+    @property
+    def name_symbol(self):
         return self._name
 
     def __str__(self):
@@ -241,12 +505,18 @@ class StringLiteralNode(LiteralNode):
 
 class MemberNode(Node):
 
+    _symbol_attributes = ('_name',)
+
     def __init__(self, origin, name):
         super().__init__(origin)
-        self._name = name
+        self._name = symbols.SYMBOLS.intern(name)
 
     @property
     def name(self):
+        return symbols.SYMBOLS.name(self._name)
+
+    @property
+    def name_symbol(self):
         return self._name
 
     @property
@@ -296,23 +566,179 @@ class OperatorNode(Node):
     def operand_count(self):
         return self._operand_count
 
-    def pop_operands(self, output_stack):
-        operands = output_stack.pop_many(self.operand_count)
-        for operand in operands:
-            self.add(operand)
-
     def __str__(self):
         return "operator {}".format(self.operator)
 
 
+class IndexNode(Node):
+
+    def __init__(self, origin):
+        super().__init__(origin)
+
+    @property
+    def target(self):
+        if len(self.children) > 0:
+            return self.children[0]
+        else:
+            return None
+
+    @property
+    def index(self):
+        if len(self.children) > 1:
+            return self.children[1]
+        else:
+            return None
+
+    def __str__(self):
+        return "index"
+
+
+class IfNode(Node):
+    """children are the condition, the code block and an optional else branch (a code block or another IfNode)"""
+
+    def __init__(self, origin):
+        super().__init__(origin)
+
+    @property
+    def condition(self):
+        if len(self.children) > 0:
+            return self.children[0]
+        else:
+            return None
+
+    @property
+    def code_block(self):
+        if len(self.children) > 1:
+            return self.children[1]
+        else:
+            return None
+
+    @property
+    def else_branch(self):
+        if len(self.children) > 2:
+            return self.children[2]
+        else:
+            return None
+
+    def __str__(self):
+        return "if expression"
+
+
+class WhileNode(Node):
+
+    def __init__(self, origin):
+        super().__init__(origin)
+
+    @property
+    def condition(self):
+        if len(self.children) > 0:
+            return self.children[0]
+        else:
+            return None
+
+    @property
+    def code_block(self):
+        if len(self.children) > 1:
+            return self.children[1]
+        else:
+            return None
+
+    def __str__(self):
+        return "while loop"
+
+
+class ForNode(Node):
+
+    _symbol_attributes = ('_variable_name',)
+
+    def __init__(self, origin, variable_name):
+        super().__init__(origin)
+        self._variable_name = symbols.SYMBOLS.intern(variable_name)
+
+    @property
+    def variable_name(self):
+        return symbols.SYMBOLS.name(self._variable_name)
+
+    @property
+    def variable_name_symbol(self):
+        return self._variable_name
+
+    @property
+    def iterable(self):
+        if len(self.children) > 0:
+            return self.children[0]
+        else:
+            return None
+
+    @property
+    def code_block(self):
+        if len(self.children) > 1:
+            return self.children[1]
+        else:
+            return None
+
+    def __str__(self):
+        return "for loop over '{}'".format(self.variable_name)
+
+
+class MatchNode(Node):
+    """children are the matched expression followed by one MatchArmNode per arm"""
+
+    def __init__(self, origin):
+        super().__init__(origin)
+
+    @property
+    def expression(self):
+        if len(self.children) > 0:
+            return self.children[0]
+        else:
+            return None
+
+    @property
+    def arms(self):
+        return self.children[1:]
+
+    def __str__(self):
+        return "match expression"
+
+
+class MatchArmNode(Node):
+
+    def __init__(self, origin):
+        super().__init__(origin)
+
+    @property
+    def pattern(self):
+        if len(self.children) > 0:
+            return self.children[0]
+        else:
+            return None
+
+    @property
+    def code_block(self):
+        if len(self.children) > 1:
+            return self.children[-1]
+        else:
+            return None
+
+    def __str__(self):
+        return "match arm"
+
+
 class MethodNode(Node):
 
+    _symbol_attributes = ('_name',)
+
     def __init__(self, origin, name):
         super().__init__(origin)
-        self._name = name
+        self._name = symbols.SYMBOLS.intern(name)
 
     @property
     def name(self):
+        return symbols.SYMBOLS.name(self._name)
+
+    @property
+    def name_symbol(self):
         return self._name
 
     @property
@@ -342,12 +768,18 @@ class MethodNode(Node):
 
 class ParameterNode(Node):
 
+    _symbol_attributes = ('_name',)
+
     def __init__(self, origin, name):
         super().__init__(origin)
-        self._name = name
+        self._name = symbols.SYMBOLS.intern(name)
 
     @property
     def name(self):
+        return symbols.SYMBOLS.name(self._name)
+
+    @property
+    def name_symbol(self):
         return self._name
 
     @property
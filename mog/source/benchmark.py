@@ -0,0 +1,237 @@
+"""
+this module provides parser throughput benchmarking for mog's custom language, over a synthetic corpus
+"""
+
+
+from collections import namedtuple
+from . import parser
+from . import source
+import gc
+import json
+import platform
+import random
+import time
+import tracemalloc
+
+
+class CorpusSettings(namedtuple('CorpusSettings', 'members methods events statements parameters depth comments')):
+    """
+    controls the mix of the generated corpus, each object gets up to the given number of members, methods and
+    events, each method or event up to the given number of statements, expressions nest up to depth levels, and
+    comments is the chance of a comment being placed before an object
+    """
+    pass
+
+
+DEFAULT_SETTINGS = CorpusSettings(members=6, methods=3, events=3, statements=6, parameters=3, depth=4, comments=0.3)
+
+EVENT_NAMES = ['create', 'destroy', 'step', 'draw']
+TYPE_NAMES = ['real', 'string', 'bool', 'Vector']
+INFIX_OPERATORS = ['+', '-', '*', '/', '<', '<=', '>', '>=', '==', '!=', '&&', '||']
+PREFIX_OPERATORS = ['-', '!']
+FUNCTION_NAMES = ['add', 'div', 'clamp', 'max', 'point_distance', 'draw_rectangle']
+
+
+class CorpusGenerator(object):
+    """generates deterministic, syntactically valid mog source of roughly a requested size"""
+
+    def __init__(self, settings=DEFAULT_SETTINGS, seed=0):
+        self._settings = settings
+        self._random = random.Random(seed)
+        self._object_count = 0
+
+    def _name(self, prefix):
+        return "{}{}".format(prefix, self._random.randrange(64))
+
+    def _expression(self, depth):
+        rand = self._random
+        if depth <= 0 or rand.random() < 0.3:
+            choice = rand.randrange(4)
+            if choice == 0:
+                return str(rand.randrange(1000))
+            elif choice == 1:
+                return '"text {}"'.format(rand.randrange(100))
+            elif choice == 2:
+                return self._name("var")
+            else:
+                return "{}.{}".format(self._name("var"), self._name("field"))
+        choice = rand.randrange(5)
+        if choice == 0:
+            return "{}({})".format(rand.choice(FUNCTION_NAMES), ", ".join(
+                self._expression(depth - 1) for _ in range(rand.randrange(4))
+            ))
+        elif choice == 1:
+            return "({})".format(self._expression(depth - 1))
+        elif choice == 2:
+            return "{}{}".format(rand.choice(PREFIX_OPERATORS), self._expression(depth - 1))
+        else:
+            return "{} {} {}".format(
+                self._expression(depth - 1), rand.choice(INFIX_OPERATORS), self._expression(depth - 1)
+            )
+
+    def _statement(self, indent):
+        rand = self._random
+        depth = self._settings.depth
+        choice = rand.randrange(6)
+        if choice == 0:
+            text = "let {}: {} = {};".format(self._name("local"), rand.choice(TYPE_NAMES), self._expression(depth))
+        elif choice == 1:
+            text = "{} = {};".format(self._name("var"), self._expression(depth))
+        elif choice == 2:
+            text = "{} += {};".format(self._name("var"), self._expression(depth))
+        elif choice == 3:
+            text = "{}({});".format(rand.choice(FUNCTION_NAMES), ", ".join(
+                self._expression(depth - 1) for _ in range(rand.randrange(4))
+            ))
+        elif choice == 4:
+            text = "if {} {{ {} }}".format(self._expression(depth - 1), self._simple_statement())
+            for _ in range(rand.randrange(3)):
+                text += " else if {} {{ {} }}".format(self._expression(depth - 1), self._simple_statement())
+            if rand.random() < 0.5:
+                text += " else {{ {} }}".format(self._simple_statement())
+        else:
+            text = "{} = match {} {{ {} }};".format(self._name("var"), self._name("var"), " ".join(
+                "{}.{} {{ {} }},".format(self._name("Kind"), self._name("Case"), self._expression(depth - 1))
+                for _ in range(rand.randint(1, 4))
+            ))
+        return indent + text
+
+    def _simple_statement(self):
+        return "{} = {};".format(self._name("var"), self._expression(self._settings.depth - 1))
+
+    def _code_block(self, indent):
+        lines = ["{"]
+        for _ in range(self._random.randint(1, self._settings.statements)):
+            lines.append(self._statement(indent + "    "))
+        lines.append(indent + "}")
+        return "\n".join(lines)
+
+    def generate_object(self):
+        rand = self._random
+        settings = self._settings
+        lines = []
+        if rand.random() < settings.comments:
+            lines.append("# synthetic object {}".format(self._object_count))
+        if self._object_count > 0 and rand.random() < 0.5:
+            parent = " : objSynthetic{}".format(rand.randrange(self._object_count))
+        else:
+            parent = ""
+        lines.append("object objSynthetic{}{} {{".format(self._object_count, parent))
+        for index in range(rand.randint(0, settings.members)):
+            lines.append("    member member{}: {} = {};".format(
+                index, rand.choice(TYPE_NAMES), self._expression(settings.depth)
+            ))
+        for index in range(rand.randint(0, settings.methods)):
+            parameters = ", ".join(
+                "param{}: {}".format(parameter, rand.choice(TYPE_NAMES))
+                for parameter in range(rand.randint(0, settings.parameters))
+            )
+            lines.append("    method method{}({}): {} {}".format(
+                index, parameters, rand.choice(TYPE_NAMES), self._code_block("    ")
+            ))
+        for event_name in rand.sample(EVENT_NAMES, rand.randint(0, min(settings.events, len(EVENT_NAMES)))):
+            lines.append("    event {} {}".format(event_name, self._code_block("    ")))
+        lines.append("}")
+        lines.append("")
+        self._object_count += 1
+        return "\n".join(lines) + "\n"
+
+    def generate(self, size):
+        """generates objects until the source is at least size characters long"""
+        chunks = []
+        total = 0
+        while total < size:
+            chunk = self.generate_object()
+            chunks.append(chunk)
+            total += len(chunk)
+        return "".join(chunks)
+
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while len(stack) > 0:
+        count += 1
+        stack.extend(stack.pop().children)
+    return count
+
+
+def benchmark_source(text, repeats=3, measure_memory=True):
+    """parses text repeats times, returning the fastest timing along with throughput and peak memory"""
+    best = None
+    result = None
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        result = parser.Parser(source.TextSource(text, "<benchmark>")).parse()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    nodes = count_nodes(result.ast)
+
+    peak_memory = None
+    if measure_memory:
+        result = None
+        gc.collect()
+        tracemalloc.start()
+        parser.Parser(source.TextSource(text, "<benchmark>")).parse()
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'chars': len(text),
+        'nodes': nodes,
+        'seconds': best,
+        'chars_per_second': len(text) / best if best > 0 else None,
+        'nodes_per_second': nodes / best if best > 0 else None,
+        'peak_memory_bytes': peak_memory,
+    }
+
+
+def run(sizes, settings=DEFAULT_SETTINGS, seed=0, repeats=3, measure_memory=True, label=None):
+    """benchmarks the parser over a generated corpus of each of the given sizes (in characters)"""
+    results = []
+    for size in sizes:
+        text = CorpusGenerator(settings, seed).generate(size)
+        measurement = benchmark_source(text, repeats, measure_memory)
+        measurement['size'] = size
+        results.append(measurement)
+    return {
+        'label': label,
+        'parser_version': parser.PARSER_VERSION,
+        'python': platform.python_version(),
+        'settings': settings._asdict(),
+        'seed': seed,
+        'repeats': repeats,
+        'results': results,
+    }
+
+
+def save(report, path):
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2)
+
+
+def load(path):
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def compare(report, baseline):
+    """returns (size, throughput ratio against baseline) for each corpus size the two reports share"""
+    baseline_results = {result['size']: result for result in baseline['results']}
+    comparison = []
+    for result in report['results']:
+        if result['size'] in baseline_results:
+            previous = baseline_results[result['size']]
+            comparison.append((result['size'], result['chars_per_second'] / previous['chars_per_second']))
+    return comparison
+
+
+def parse_size(text):
+    """parses a size such as 1024, 64K, 10M into a number of characters"""
+    multipliers = {'K': 1024, 'M': 1024 * 1024, 'G': 1024 * 1024 * 1024}
+    text = text.strip().upper().rstrip('B')
+    if len(text) > 0 and text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
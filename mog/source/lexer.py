@@ -0,0 +1,144 @@
+"""
+this module provides the tokenizer for mog's custom language, which turns a source into a token stream for the parser
+"""
+
+
+from array import array
+from . import operators
+from . import source
+import re
+import sys
+
+
+IDENTIFIER = 0
+NUMBER = 1
+STRING = 2
+OPERATOR = 3
+PUNCTUATION = 4
+ERROR = 5
+EOF = 6
+
+
+PUNCTUATION_CHARACTERS = '{}()[]:;,'
+
+
+def _build_master_pattern(operator_table):
+    # leading whitespace is folded into every match so each token costs exactly one match, the token itself is
+    # the only group that takes part in the match, so its index identifies the kind of the token. runs of operator
+    # characters are matched as a whole and split into operators afterwards by the operator table
+    operator_characters = "".join(sorted(operator_table.characters))
+    return re.compile(r"""
+        \s*(?:
+            (\#[^\n]*)                          # comment
+            | ({identifier_start}{identifier}*) # identifier
+            | ({digits}+(?:\.{digits}+)?)      # number
+            | ("(?:[^"\\]|\\.)*")               # string
+            | ([{operators}]+)                  # operator(s)
+            | ([{punctuation}])                 # punctuation
+            | ("(?:[^"\\]|\\.)*|\S)             # unterminated string, or anything else, is an error
+        )
+    """.format(
+        identifier_start=source.IDENTIFIER_START.pattern,
+        identifier=source.IDENTIFIER.pattern,
+        digits=source.DIGITS.pattern,
+        operators=re.escape(operator_characters),
+        punctuation=re.escape(PUNCTUATION_CHARACTERS)
+    ), re.VERBOSE | re.DOTALL)
+
+
+_MASTER_PATTERN = _build_master_pattern(operators.OPERATORS)
+_COMMENT_GROUP = 1
+_OPERATOR_GROUP = 5
+_GROUP_KINDS = [None, None, IDENTIFIER, NUMBER, STRING, OPERATOR, PUNCTUATION, ERROR]
+
+
+class TokenStream(object):
+    """
+    the tokens of a single source, stored as parallel arrays of kinds, start offsets and interned lexemes
+
+    comments are kept out of the token stream (in their own offset/text arrays) since only the top level of
+    the grammar cares about them, the stream always ends in a single EOF token
+    """
+
+    __slots__ = ('_lines', '_kinds', '_offsets', '_lexemes', '_comment_offsets', '_comments')
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._kinds = array('B')
+        self._offsets = array('q')
+        self._lexemes = []
+        self._comment_offsets = array('q')
+        self._comments = []
+
+    @property
+    def lines(self):
+        return self._lines
+
+    @property
+    def kinds(self):
+        return self._kinds
+
+    @property
+    def offsets(self):
+        return self._offsets
+
+    @property
+    def lexemes(self):
+        return self._lexemes
+
+    @property
+    def comment_offsets(self):
+        return self._comment_offsets
+
+    @property
+    def comments(self):
+        return self._comments
+
+    def __len__(self):
+        return len(self._kinds)
+
+
+def tokenize(src, start=0, end=None):
+    """tokenizes the text of the given source (or just text[start:end]) in a single regex scan"""
+
+    text = src.text
+    if end is None:
+        end = len(text)
+    operator_table = operators.OPERATORS
+    operator_symbols = operator_table.symbols
+    tokens = TokenStream(src.lines)
+    kinds = tokens.kinds
+    offsets = tokens.offsets
+    lexemes = tokens.lexemes
+    intern = sys.intern
+
+    # every match starts by skipping whitespace, so at each position of a trailing run of whitespace (where no token
+    # follows) a match would skip to the end before failing, scanning the run quadratically. it is left out instead
+    scan_end = end
+    while scan_end > start and text[scan_end - 1].isspace():
+        scan_end -= 1
+
+    for match in _MASTER_PATTERN.finditer(text, start, scan_end):
+        group = match.lastindex
+        if group == _COMMENT_GROUP:
+            tokens.comment_offsets.append(match.start(group))
+            tokens.comments.append(match.group(group))
+        elif group == _OPERATOR_GROUP and match.group(group) not in operator_symbols:
+            for offset, symbol in operator_table.munch(text, match.start(group), match.end(group)):
+                if symbol is None:
+                    kinds.append(ERROR)
+                    offsets.append(offset)
+                    lexemes.append(intern(text[offset]))
+                else:
+                    kinds.append(OPERATOR)
+                    offsets.append(offset)
+                    lexemes.append(symbol)
+        else:
+            kinds.append(_GROUP_KINDS[group])
+            offsets.append(match.start(group))
+            lexemes.append(intern(match.group(group)))
+
+    kinds.append(EOF)
+    offsets.append(end)
+    lexemes.append("")
+    return tokens
@@ -0,0 +1,129 @@
+"""
+this module provides the operator table for mog's custom language, shared by the lexer and the parser
+"""
+
+
+from collections import namedtuple
+
+
+LEFT = 0
+RIGHT = 1
+
+
+class OperatorInfo(namedtuple('OperatorInfo', 'symbol precedence associativity')):
+    pass
+
+
+class OperatorTable(object):
+    """
+    the operators of the language with their precedence and associativity, split by how they are used
+
+    every symbol is also entered into a character trie, so the lexer can split a run of operator characters into
+    operators by maximal munch, examining each character once. calls and indexing are not in the table, they are
+    postfix forms that always bind tightest
+    """
+
+    def __init__(self):
+        self._infix = {}
+        self._prefix = {}
+        self._postfix = {}
+        self._assignment = {}
+        self._trie = {}
+
+    def _add_symbol(self, symbol):
+        node = self._trie
+        for char in symbol:
+            node = node.setdefault(char, {})
+        node[None] = symbol
+
+    def add_infix(self, symbol, precedence, associativity=LEFT):
+        self._infix[symbol] = OperatorInfo(symbol, precedence, associativity)
+        self._add_symbol(symbol)
+
+    def add_prefix(self, symbol, precedence):
+        self._prefix[symbol] = OperatorInfo(symbol, precedence, RIGHT)
+        self._add_symbol(symbol)
+
+    def add_postfix(self, symbol, precedence):
+        self._postfix[symbol] = OperatorInfo(symbol, precedence, LEFT)
+        self._add_symbol(symbol)
+
+    def add_assignment(self, symbol, operator=None):
+        """adds an assignment symbol, operator being the infix operator it applies (e.g. '+' for '+='), if any"""
+        self._assignment[symbol] = operator
+        self._add_symbol(symbol)
+
+    def infix(self, symbol):
+        return self._infix.get(symbol)
+
+    def prefix(self, symbol):
+        return self._prefix.get(symbol)
+
+    def postfix(self, symbol):
+        return self._postfix.get(symbol)
+
+    def is_assignment(self, symbol):
+        return symbol in self._assignment
+
+    def assignment_operator(self, symbol):
+        return self._assignment[symbol]
+
+    @property
+    def symbols(self):
+        return set(self._infix) | set(self._prefix) | set(self._postfix) | set(self._assignment)
+
+    @property
+    def characters(self):
+        return set("".join(self.symbols))
+
+    def munch(self, text, start, end):
+        """
+        splits text[start:end] into operator symbols by maximal munch, yielding (offset, symbol) pairs
+
+        symbol is None for a character that does not begin any operator
+        """
+        trie = self._trie
+        offset = start
+        while offset < end:
+            node = trie
+            index = offset
+            symbol = None
+            symbol_end = offset + 1
+            while index < end:
+                node = node.get(text[index])
+                if node is None:
+                    break
+                index += 1
+                if None in node:
+                    symbol = node[None]
+                    symbol_end = index
+            yield offset, symbol
+            offset = symbol_end
+
+
+def _build_default_table():
+    table = OperatorTable()
+    table.add_infix('&&', 5)
+    table.add_infix('||', 5)
+    table.add_infix('==', 10)
+    table.add_infix('!=', 10)
+    table.add_infix('<', 20)
+    table.add_infix('>', 20)
+    table.add_infix('<=', 20)
+    table.add_infix('>=', 20)
+    table.add_infix('+', 50)
+    table.add_infix('-', 50)
+    table.add_infix('*', 100)
+    table.add_infix('/', 100)
+    table.add_infix('.', 200)
+    table.add_prefix('-', 150)
+    table.add_prefix('!', 150)
+    table.add_assignment('=')
+    table.add_assignment('+=', '+')
+    table.add_assignment('-=', '-')
+    table.add_assignment('*=', '*')
+    table.add_assignment('/=', '/')
+    return table
+
+
+OPERATORS = _build_default_table()
@@ -5,8 +5,20 @@ this module provides the parsing for mog's custom language
 
 from collections import namedtuple
 from . import source
+from . import lexer
+from . import operators
 from . import ast
-import string
+import io
+
+
+# bump whenever the shape of the AST or of parser results changes, so stale cached results are not reused
+PARSER_VERSION = 4
+
+# how deeply code blocks and expressions may nest, deeper source is reported rather than overflowing the stack of
+# the recursive descent. the parser is the only stage that recurses on the tree, at this depth it needs about 650
+# frames of python's default limit of 1000, every later stage (the cache, worker processes, passes, code
+# generation) handles trees of any depth
+MAX_NESTING_DEPTH = 128
 
 
 class ParserMessage(namedtuple('ParserMessage', 'type contents origin')):
@@ -52,134 +64,119 @@ class FatalParserError(Exception):
         return self._origin
 
 
-class IdentifierPredicate(object):
-
-    def __init__(self):
-        self._first = True
-
-    def __call__(self, char):
-        allowed = string.ascii_letters + "_"
-        if not self._first:
-            allowed += string.digits
-        self._first = False
-        return char in allowed
-
-
-class StringLiteralPredicate(object):
-
-    def __init__(self):
-        self._ignore = False
-
-    def __call__(self, char):
-        if not self._ignore:
-            if char == '\\':
-                self._ignore = True
-            result = char != '"'
-        else:
-            self._ignore = False
-            result = True
-        return result
-
-
 class Parser(object):
 
-    COMMENT_CHARACTER = '#'
-
-    def __init__(self, src):
-        self._result = ParserResult(src.source_name)
-        self._src = src
-        self._operators = {
-            '&&': 5,
-            '||': 5,
-            '==': 10,
-            '!=': 10,
-            '<': 20,
-            '>': 20,
-            '<=': 20,
-            '>=': 20,
-            '+': 50,
-            '-': 50,
-            '*': 100,
-            '/': 100,
-        }
+    def __init__(self, src, start=0, end=None):
+        self._pending = ParserResult(src.lines)
+        self._tokens = lexer.tokenize(src, start, end)
+        self._lines = self._tokens.lines
+        self._kinds = self._tokens.kinds
+        self._offsets = self._tokens.offsets
+        self._lexemes = self._tokens.lexemes
+        self._index = 0
+        self._comment_index = 0
+        self._operators = operators.OPERATORS
+        # indexing binds like member access, so a.b[i] indexes a.b rather than accessing b[i] on a
+        self._index_precedence = self._operators.infix('.').precedence
+        self._nesting = 0
 
     @property
     def position(self):
-        return self._src.position
+        return source.SourcePoint(self._lines, self._offsets[self._index])
 
     def verbose(self, contents, origin=None):
         if origin is None:
             origin = self.position
-        self._result.verbose(contents, origin)
+        self._pending.verbose(contents, origin)
 
     def info(self, contents, origin=None):
         if origin is None:
             origin = self.position
-        self._result.info(contents, origin)
+        self._pending.info(contents, origin)
 
     def warn(self, contents, origin=None):
         if origin is None:
             origin = self.position
-        self._result.warn(contents, origin)
+        self._pending.warn(contents, origin)
 
     def error(self, contents, origin=None):
         if origin is None:
             origin = self.position
-        self._result.error(contents, origin)
+        self._pending.error(contents, origin)
 
     def fatal_error(self, contents, origin=None):
         if origin is None:
             origin = self.position
         raise FatalParserError(contents, origin)
 
-    def skip_while(self, predicate, eof_allowed=False):
-        self.consume_while(predicate, eof_allowed)
+    def is_eof(self) -> bool:
+        return self._kinds[self._index] == lexer.EOF
 
-    def consume_while(self, predicate, eof_allowed=False):
-        result = ""
-        while self.peek() is not None and predicate(self.peek()):
-            result += self._src.get()
-        if self.peek() is None and not eof_allowed:
-            self.fatal_error("unexpected EOF")
-        return result
+    def peek_kind(self) -> int:
+        return self._kinds[self._index]
 
-    def consume_until(self, predicate, eof_allowed=False):
-        return self.consume_while(lambda x: not predicate(x), eof_allowed)
+    def peek(self) -> str:
+        if self._kinds[self._index] == lexer.EOF:
+            return None
+        return self._lexemes[self._index]
 
-    def skip_expected_while(self, predicate, expected, eof_allowed=False):
-        consumed = self.consume_while(predicate, eof_allowed)
-        return consumed == expected
+    def get(self) -> str:
+        if self._kinds[self._index] == lexer.EOF:
+            self.fatal_error("unexpected EOF")
+        result = self._lexemes[self._index]
+        self._index += 1
+        return result
 
-    def skip_whitespace(self, eof_allowed=False):
-        def whitespace_predicate(char):
-            return char in string.whitespace
-        self.skip_while(whitespace_predicate, eof_allowed)
+    def skip_stuck_token(self, index):
+        """skips the current token if nothing has been consumed since index, so error recovery always progresses"""
+        if self._index == index:
+            self.get()
 
-    def skip_expected_identifier(self, identifier, eof_allowed=False):
-        return self.skip_expected_while(IdentifierPredicate(), identifier.encode(), eof_allowed)
+    def skip_to_end_of_statement(self):
+        """
+        error recovery: skips tokens up to and including the next ';' or {...} block at the current nesting
+        level, stopping early at a closing bracket that belongs to an enclosing construct
+        """
+        depth = 0
+        while True:
+            token = self.peek()
+            if token in ('{', '(', '['):
+                depth += 1
+            elif token in ('}', ')', ']'):
+                if depth == 0:
+                    break
+                depth -= 1
+                if depth == 0 and token == '}':
+                    self.get()
+                    break
+            elif depth == 0 and token == ';':
+                self.get()
+                break
+            self.get()
 
     def parse_identifier(self, eof_allowed=False) -> str:
-        self.skip_whitespace(eof_allowed)
-        return self.consume_while(IdentifierPredicate(), eof_allowed)
-
-    def parse_comment(self) -> ast.CommentNode:
-        self.skip_whitespace()
-        if self.peek() != Parser.COMMENT_CHARACTER:
-            self.info("parse_comment called when no comment character found")
-            result = None
+        if self._kinds[self._index] == lexer.IDENTIFIER:
+            result = self.get()
         else:
-            start_position = self.position
-            comment = self.consume_until(lambda x: x == '\n', True)
-            if self.peek() == '\n':
-                self.get()
-            result = ast.CommentNode(start_position, comment)
+            if self.is_eof() and not eof_allowed:
+                self.fatal_error("unexpected EOF")
+            result = ""
         return result
 
-    def peek(self) -> str:
-        return self._src.peek()
-
-    def get(self) -> str:
-        return self._src.get()
+    def parse_comments(self, parent):
+        """adds the comments between the end of the previous top level declaration and the current token"""
+        comment_offsets = self._tokens.comment_offsets
+        end = self._offsets[self._index]
+        if self._index > 0:
+            last = self._offsets[self._index - 1]
+        else:
+            last = -1
+        while self._comment_index < len(comment_offsets) and comment_offsets[self._comment_index] < end:
+            offset = comment_offsets[self._comment_index]
+            if offset > last:
+                comment = self._tokens.comments[self._comment_index]
+                parent.add(ast.CommentNode(source.SourcePoint(self._lines, offset), comment))
+            self._comment_index += 1
 
     def parse_type(self, parent):
         start_position = self.position
@@ -189,15 +186,11 @@ class Parser(object):
         parent.add(ast.TypeNode(start_position, typename))
 
     def parse_let_statement(self, parent, start_position):
-        self.skip_whitespace()
         name = self.parse_identifier()
-        self.skip_whitespace()
         let_node = ast.LetNode(start_position, name)
         if self.peek() == ':':
             self.get()
-            self.skip_whitespace()
             self.parse_type(let_node)
-            self.skip_whitespace()
         if self.peek() != '=':
             self.error("expected '=' sign in let statement")
         else:
@@ -206,157 +199,253 @@ class Parser(object):
         parent.add(let_node)
 
     def parse_if_expression(self, parent, start_position):
-        pass
+        """
+        parses 'if <condition> {...}' with any 'else if' and 'else' branches following it
+
+        an 'else if' chain is built iteratively, each branch being nested as the else branch of the one before it,
+        so a long chain costs neither recursion depth nor more than one pass over its tokens
+        """
+        result = ast.IfNode(start_position)
+        branch = result
+        while True:
+            self.parse_expression(branch)
+            self.parse_code_block(branch)
+            if self.peek() != 'else':
+                break
+            self.get()
+            if self.peek() != 'if':
+                self.parse_code_block(branch)
+                break
+            else_if = ast.IfNode(self.position)
+            self.get()
+            branch.add(else_if)
+            branch = else_if
+        parent.add(result)
 
     def parse_while_expression(self, parent, start_position):
-        pass
+        loop = ast.WhileNode(start_position)
+        self.parse_expression(loop)
+        self.parse_code_block(loop)
+        parent.add(loop)
 
     def parse_for_expression(self, parent, start_position):
-        pass
-
-    def parse_numeric_literal(self, parent):
-        position = self.position
-        result = self.consume_while(lambda x: x in string.digits)
-        parent.add(ast.NumericLiteralNode(position, result))
-
-    def parse_string_literal(self, parent):
-        position = self.position
-        if self.peek() != '"':
-            self.error("expected '\"' at start of string literal")
+        variable_name = self.parse_identifier()
+        if variable_name == "":
+            self.error("expected a loop variable after 'for'")
+        loop = ast.ForNode(start_position, variable_name)
+        if self.peek() != 'in':
+            self.error("expected 'in' after loop variable")
         else:
             self.get()
-        result = self.consume_while(StringLiteralPredicate())
-        if self.peek() == '"':
+        self.parse_expression(loop)
+        self.parse_code_block(loop)
+        parent.add(loop)
+
+    def parse_match_expression(self, parent, start_position):
+        """parses 'match <expression> { <pattern> {...}, ... }', the ',' after the last arm being optional"""
+        match = ast.MatchNode(start_position)
+        self.parse_expression(match)
+        if self.peek() != '{':
+            self.error("expected '{' after match expression")
+        else:
             self.get()
-        parent.add(ast.StringLiteralNode(position, result))
-
-    def parse_operator(self) -> ast.OperatorNode:
-        consumed = ""
+        while self.peek() != '}':
+            index = self._index
+            arm = ast.MatchArmNode(self.position)
+            self.parse_expression(arm)
+            self.parse_code_block(arm)
+            match.add(arm)
+            if self.peek() == ',':
+                self.get()
+            elif self.peek() != '}':
+                self.error("expected ',' between match arms")
+            self.skip_stuck_token(index)
+        self.get()
+        parent.add(match)
 
-        def start_of_operator(x):
-            return any([
-                operator.startswith(x)
-                for operator in self._operators.keys()
-            ])
+    def _enter_nesting(self):
+        if self._nesting >= MAX_NESTING_DEPTH:
+            self.fatal_error("nested too deeply, more than {} levels".format(MAX_NESTING_DEPTH))
+        self._nesting += 1
 
-        self.skip_whitespace()
+    def parse_primary(self):
+        """parses a value, a prefix operator applied to one, or a parenthesised expression"""
+        kind = self.peek_kind()
         start_position = self.position
-        while start_of_operator(consumed + self.peek()):
-            consumed += self.get()
-
-        if consumed not in self._operators.keys():
-            result = None
-        else:
-            result = ast.OperatorNode(start_position, consumed, self._operators[consumed])
-
+        result = None
+        if kind == lexer.NUMBER:
+            result = ast.NumericLiteralNode(start_position, self.get())
+        elif kind == lexer.STRING:
+            result = ast.StringLiteralNode(start_position, self.get()[1:-1])
+        elif kind == lexer.IDENTIFIER:
+            identifier = self.get()
+            if identifier in ('if', 'match'):
+                holder = ast.Node(start_position)
+                if identifier == 'if':
+                    self.parse_if_expression(holder, start_position)
+                else:
+                    self.parse_match_expression(holder, start_position)
+                result = holder.children[0]
+            elif self.peek() == '(':
+                holder = ast.Node(start_position)
+                self.parse_function_call(identifier, holder, start_position)
+                result = holder.children[0]
+            else:
+                result = ast.IdentifierNode(start_position, identifier)
+        elif kind == lexer.OPERATOR and self._operators.prefix(self.peek()) is not None:
+            info = self._operators.prefix(self.get())
+            result = ast.OperatorNode(start_position, info.symbol, info.precedence, 1)
+            result.add(self.parse_operand(info.precedence))
+        elif self.peek() == '(':
+            self.get()
+            result = self.parse_operand(0)
+            if self.peek() != ')':
+                self.error("expected ')' to close parenthesised expression")
+            else:
+                self.get()
+        elif kind == lexer.ERROR and self.peek().startswith('"'):
+            self.error("unterminated string literal")
         return result
 
-    def parse_expression(self, parent):
-        self.skip_whitespace()
-
-        output_stack = ast.Node(self.position)
-        operator_stack = []
-        expecting_operator = False
-        value_expected = True
-        finished = False
-
-        while not finished:
-            peeked = self.peek()
-            if not expecting_operator:
-                if peeked in string.digits:
-                    self.parse_numeric_literal(output_stack)
-                elif peeked == '"':
-                    self.parse_string_literal(output_stack)
-                elif IdentifierPredicate()(peeked):
-                    identifier_start = self.position
-                    identifier = self.parse_identifier()
-                    self.skip_whitespace()
-                    if self.peek() == '(':
-                        self.parse_function_call(identifier, output_stack, identifier_start)
-                    else:
-                        output_stack.add(ast.IdentifierNode(identifier_start, identifier))
+    def parse_operand(self, min_precedence):
+        """
+        parses an expression whose operators all bind at least as tightly as min_precedence (precedence climbing)
+
+        chains of operators of the same precedence are folded iteratively, only a rise in precedence (or a
+        right-associative operator) recurses, so the stack depth is bounded by the expression's nesting rather
+        than its length
+        """
+        self._enter_nesting()
+        try:
+            return self._parse_operand(min_precedence)
+        finally:
+            self._nesting -= 1
+
+    def _parse_operand(self, min_precedence):
+        left = self.parse_primary()
+        if left is None:
+            self.error("expected another value after last operator")
+            return None
+        while True:
+            token = self.peek()
+            start_position = self.position
+            if token == '(':
+                self.error("only named functions can be called")
+                self.skip_to_end_of_statement()
+                break
+            elif token == '[' and min_precedence <= self._index_precedence:
+                self.get()
+                index = ast.IndexNode(start_position)
+                index.add(left)
+                index.add(self.parse_operand(0))
+                if self.peek() != ']':
+                    self.error("expected ']' after index expression")
                 else:
-                    if value_expected:
-                        self.error("expected another value after last operator")
-                    finished = True
+                    self.get()
+                left = index
+                continue
+            if self.peek_kind() != lexer.OPERATOR:
+                break
+            info = self._operators.postfix(token)
+            if info is not None and info.precedence >= min_precedence:
+                self.get()
+                operator = ast.OperatorNode(start_position, info.symbol, info.precedence, 1)
+                operator.add(left)
+                left = operator
+                continue
+            info = self._operators.infix(token)
+            if info is None or info.precedence < min_precedence:
+                break
+            self.get()
+            if info.associativity == operators.LEFT:
+                next_precedence = info.precedence + 1
             else:
-                operator = self.parse_operator()
-                if operator is not None:
-                    while len(operator_stack) > 0 and operator.priority < operator_stack[-1].priority:
-                        popped = operator_stack[-1]
-                        operator_stack = operator_stack[:-1]
-                        popped.pop_operands(output_stack)
-                        output_stack.add(popped)
-                    operator_stack.append(operator)
-                    value_expected = True
-                else:
-                    finished = True
-            expecting_operator = not expecting_operator
-            self.skip_whitespace()
-
-        while len(operator_stack) > 0:
-            popped = operator_stack[-1]
-            operator_stack = operator_stack[:-1]
-            popped.pop_operands(output_stack)
-            output_stack.add(popped)
-
-        if len(output_stack.children) != 1:
-            self.error("internal error: shunting algorithm parsing expression resulted in non-1-length output stack")
-        else:
-            parent.add(output_stack.children[-1])
+                next_precedence = info.precedence
+            operator = ast.OperatorNode(start_position, info.symbol, info.precedence)
+            operator.add(left)
+            operator.add(self.parse_operand(next_precedence))
+            left = operator
+        return left
+
+    def parse_expression(self, parent):
+        parent.add(self.parse_operand(0))
 
     def parse_function_call(self, identifier, parent, start_position):
-        self.skip_whitespace()
         call = ast.FunctionCall(start_position, identifier)
         if self.peek() != '(':
             self.error("expected '(' for parameter list in function call")
         else:
             self.get()
-        self.skip_whitespace()
         first = True
         parameter_list = ast.ParameterListNode(self.position)
         while self.peek() != ')':
+            index = self._index
             if not first:
                 if self.peek() != ',':
                     self.error("expected ',' between parameters")
                 else:
                     self.get()
-            self.skip_whitespace()
             self.parse_expression(parameter_list)
-            self.skip_whitespace()
+            self.skip_stuck_token(index)
             first = False
         self.get()
         call.add(parameter_list)
         parent.add(call)
 
-    def parse_assignment(self, identifier, parent, start_position):
-        if self.peek() != '=':
+    def parse_assignment(self, destination, parent, start_position, target=None):
+        """
+        parses the right hand side of an assignment, destination being the name assigned to, or None when
+        assigning to a target expression such as a member access
+        """
+        operator = '='
+        if not self._operators.is_assignment(self.peek()):
             self.error("expected '=' after identifier in assignment")
         else:
-            self.get()
-        self.skip_whitespace()
-        assignment = ast.AssignmentNode(start_position, identifier)
+            operator = self.get()
+        assignment = ast.AssignmentNode(start_position, destination, operator)
+        assignment.add(target)
         self.parse_expression(assignment)
         parent.add(assignment)
 
     def parse_statement(self, parent) -> bool:
-        self.skip_whitespace()
+        """
+        parses a single statement, returning whether it was left without a trailing ';' (and so is used as the
+        value of its block)
+
+        the statement kind is decided by the current token and the one after it, statements that end in a block
+        (if, while, for and match) need no trailing ';'
+        """
         start_position = self.position
-        identifier = self.parse_identifier()
-        self.skip_whitespace()
-        if identifier == 'let':
+        token = self.peek()
+        if self.peek_kind() == lexer.IDENTIFIER and token in ('if', 'while', 'for', 'match'):
+            self.get()
+            if token == 'if':
+                self.parse_if_expression(parent, start_position)
+            elif token == 'while':
+                self.parse_while_expression(parent, start_position)
+            elif token == 'for':
+                self.parse_for_expression(parent, start_position)
+            else:
+                self.parse_match_expression(parent, start_position)
+            if self.peek() == ';':
+                self.get()
+            return False
+        elif token == 'let' and self.peek_kind() == lexer.IDENTIFIER:
+            self.get()
             self.parse_let_statement(parent, start_position)
-        elif identifier == 'if':
-            self.parse_if_expression(parent, start_position)
-        elif identifier == 'while':
-            self.parse_while_expression(parent, start_position)
-        elif identifier == 'for':
-            self.parse_for_expression(parent, start_position)
-        elif self.peek() == '(':
-            self.parse_function_call(identifier, parent, start_position)
-        elif self.peek() == '=':
-            self.parse_assignment(identifier, parent, start_position)
-        self.skip_whitespace()
+        elif self.peek_kind() == lexer.IDENTIFIER and self._operators.is_assignment(self._lexemes[self._index + 1]):
+            self.parse_assignment(self.get(), parent, start_position)
+        elif token != ';':
+            index = self._index
+            holder = ast.Node(start_position)
+            self.parse_expression(holder)
+            if self._index == index:
+                self.skip_to_end_of_statement()
+                return False
+            if self._operators.is_assignment(self.peek()):
+                self.parse_assignment(None, parent, start_position, holder.children[0])
+            else:
+                parent.add(holder.children[0])
         if self.peek() == ';':
             self.get()
             as_expression = False
@@ -365,38 +454,43 @@ class Parser(object):
         return as_expression
 
     def parse_code_block(self, parent):
+        self._enter_nesting()
+        try:
+            return self._parse_code_block(parent)
+        finally:
+            self._nesting -= 1
+
+    def _parse_code_block(self, parent):
         as_expression = False
-        self.skip_whitespace()
         code_block = ast.CodeBlock(self.position)
         if self.peek() != '{':
             self.error("expected '{' symbol")
         else:
             self.get()
-        self.skip_whitespace()
         while self.peek() != '}':
+            index = self._index
             as_expression = self.parse_statement(code_block)
-            self.skip_whitespace()
             if self.peek() != '}' and as_expression:
                 self.error("a statement without a trailing ';' must be last statement in block")
+                self.skip_to_end_of_statement()
+            self.skip_stuck_token(index)
         self.get()
         parent.add(code_block)
         return as_expression
 
     def parse_method(self, parent, start_position):
-        self.skip_whitespace()
         name = self.parse_identifier()
         if name == "":
             self.error("expected identifier after method keyword")
         method = ast.MethodNode(start_position, name)
-        self.skip_whitespace()
         parameters = ast.ParameterListNode(self.position)
         if self.peek() != '(':
             self.error("expected '(' after method name")
         else:
             self.get()
-        self.skip_whitespace()
         first = True
         while self.peek() != ')':
+            index = self._index
             if not first:
                 if self.peek() != ',':
                     self.error("expected ',' between parameters")
@@ -408,7 +502,6 @@ class Parser(object):
             if name == "":
                 self.error("expected identifier to name parameter")
             else:
-                self.skip_whitespace()
                 if self.peek() != ':':
                     self.error("expected ':' after parameter name")
                 else:
@@ -416,10 +509,9 @@ class Parser(object):
                 self.parse_type(argument)
             parameters.add(argument)
             first = False
-            self.skip_whitespace()
+            self.skip_stuck_token(index)
         self.get()
         method.add(parameters)
-        self.skip_whitespace()
         if self.peek() == ':':
             self.get()
             self.parse_type(method)
@@ -427,20 +519,16 @@ class Parser(object):
         parent.add(method)
 
     def parse_member(self, parent, start_position):
-        self.skip_whitespace()
         name = self.parse_identifier()
-        self.skip_whitespace()
         member = ast.MemberNode(start_position, name)
         if self.peek() != ':':
             self.error("expected ':' identifier after member name")
         else:
             self.get()
         self.parse_type(member)
-        self.skip_whitespace()
         if self.peek() == '=':
             self.get()
             self.parse_expression(member)
-        self.skip_whitespace()
         if self.peek() != ';':
             self.error("expected ';' after member declaration")
         else:
@@ -449,18 +537,15 @@ class Parser(object):
 
     def parse_event(self, parent, start_position):
         event_name = self.parse_identifier()
-        self.skip_whitespace()
         result = ast.EventNode(start_position, event_name)
         self.parse_code_block(result)
         parent.add(result)
 
     def parse_object(self, parent, start_position):
         object_name = self.parse_identifier()
-        self.skip_whitespace()
         if self.peek() == ':':
             self.get()
             parent_name = self.parse_identifier()
-            self.skip_whitespace()
         else:
             parent_name = None
 
@@ -468,9 +553,9 @@ class Parser(object):
             self.error('expected "{" symbol')
         else:
             self.get()
-        self.skip_whitespace()
         obj = ast.ObjectNode(start_position, object_name, parent_name)
         while self.peek() != '}':
+            index = self._index
             position = self.position
             identifier = self.parse_identifier()
             if identifier == 'method':
@@ -480,47 +565,117 @@ class Parser(object):
             elif identifier == 'event':
                 self.parse_event(obj, position)
             else:
-                self.error("unexpected identifier '{}'".format(identifier))
-            self.skip_whitespace()
-        if self.peek() == "}":
-            self.get()
+                if identifier == "":
+                    self.error("unexpected '{}'".format(self.peek()))
+                else:
+                    self.error("unexpected identifier '{}'".format(identifier), position)
+                self.skip_to_end_of_statement()
+                self.skip_stuck_token(index)
+        self.get()
         parent.add(obj)
 
+    def _end_of_last_token(self):
+        return self._offsets[self._index - 1] + len(self._lexemes[self._index - 1])
+
+    def _completed_declarations(self, holder):
+        """
+        yields the declarations parsed into holder along with the messages reported since the last ones, then
+        forgets both. the extent of a declaration stretches to cover any message pointing past its last token
+        """
+        messages = list(self._pending.messages)
+        del self._pending.messages[:]
+        children = list(holder.children)
+        del holder.children[:]
+
+        if len(children) == 0 or all([isinstance(child, ast.CommentNode) for child in children]):
+            for child in children:
+                start = child.origin.offset
+                yield ParsedDeclaration(child, (start, start + len(child.comment)), [])
+            if len(messages) > 0:
+                yield ParsedDeclaration(None, None, messages)
+        else:
+            end = self._end_of_last_token()
+            for message in messages:
+                end = max(end, message.origin.offset + 1)
+            for child in children:
+                start = child.origin.offset
+                if isinstance(child, ast.CommentNode):
+                    yield ParsedDeclaration(child, (start, start + len(child.comment)), [])
+                else:
+                    yield ParsedDeclaration(child, (start, end), messages)
+
     def parse_global(self, parent):
-        self.skip_whitespace(True)
-        start_position = self.position.clone()
-        peeked = self.peek()
-        if peeked is None:
+        self.parse_comments(parent)
+        start_position = self.position
+        kind = self.peek_kind()
+        if kind == lexer.EOF:
             pass
-        elif peeked == '#':
-            comment = self.parse_comment()
-            parent.add(comment)
-        elif IdentifierPredicate()(peeked):
-            identifier = self.parse_identifier()
+        elif kind == lexer.IDENTIFIER:
+            identifier = self.get()
             if identifier == 'object':
                 self.parse_object(parent, start_position)
+            else:
+                self.error("unexpected identifier '{}'".format(identifier), start_position)
         else:
-            self.error("unexpected character '{}'".format(peeked))
-            # try to recover on next line?
-            self.consume_until(lambda x: x == '\n')
-            if self.peek() == '\n':
-                self.get()
-
-    def parse(self):
+            self.error("unexpected character '{}'".format(self.get()), start_position)
+
+    def iter_parse(self):
+        """
+        parses the source one top level declaration at a time, yielding a ParsedDeclaration for each as soon as
+        it is complete. messages not belonging to any declaration (such as stray tokens between them, or a fatal
+        error) are yielded in a ParsedDeclaration with no node
+        """
+        holder = ast.Node(self.position)
         try:
-            while not self._src.is_eof():
-                self.parse_global(self._result.ast)
-                self.skip_whitespace(True)
+            while not self.is_eof():
+                self.parse_global(holder)
+                yield from self._completed_declarations(holder)
+            self.parse_comments(holder)
         except FatalParserError as err:
-            self._result.fatal_error(err.contents, err.origin)
-        return self._result
+            self._pending.fatal_error(err.contents, err.origin)
+        yield from self._completed_declarations(holder)
+
+    def parse(self):
+        result = ParserResult(self._lines)
+        for declaration in self.iter_parse():
+            result.messages.extend(declaration.messages)
+            if declaration.node is not None:
+                result.ast.add(declaration.node)
+                result.add_extent(*declaration.extent)
+        return result
+
+    def ends_cleanly(self):
+        """
+        whether the text parsed so far stops at a boundary a full parse would also stop at, that is without an
+        unterminated string or a comment running into the end of the parsed range
+        """
+        if self._index > 0:
+            last_token = self._index - 1
+            if self._kinds[last_token] == lexer.ERROR and self._lexemes[last_token].startswith('"'):
+                return False
+        comment_offsets = self._tokens.comment_offsets
+        if len(comment_offsets) > 0:
+            if comment_offsets[-1] + len(self._tokens.comments[-1]) == self._offsets[-1]:
+                return False
+        return True
+
+
+class ParsedDeclaration(namedtuple('ParsedDeclaration', 'node extent messages')):
+    """a top level declaration (or None) yielded by Parser.iter_parse, with its extent and its messages"""
+    pass
 
 
 class ParserResult(object):
 
-    def __init__(self, source_name):
+    def __init__(self, lines):
+        self._lines = lines
         self._messages = []
-        self._ast = ast.RootNode(source_name)
+        self._ast = ast.RootNode(lines.source_name)
+        self._extents = []
+
+    @property
+    def lines(self):
+        return self._lines
 
     @property
     def messages(self):
@@ -530,8 +685,19 @@ class ParserResult(object):
     def ast(self):
         return self._ast
 
+    @property
+    def extents(self):
+        """the (start, end) source offsets of each top level declaration, in the same order as ast.children"""
+        return self._extents
+
+    def has_fatal_error(self):
+        return any([message.type == ParserMessage.FATAL_ERROR for message in self.messages])
+
+    def add_extent(self, start, end):
+        self._extents.append((start, end))
+
     def report(self, message_type, contents, origin):
-        self._messages.append(ParserMessage(message_type, contents, origin.clone()))
+        self._messages.append(ParserMessage(message_type, contents, origin))
 
     def verbose(self, contents, origin):
         self.report(ParserMessage.VERBOSE, contents, origin)
@@ -559,3 +725,112 @@ def parse(file, filename):
     src = source.FileSource(file, filename)
     parser = Parser(src)
     return parser.parse()
+
+
+def iter_parse(file, filename):
+    src = source.FileSource(file, filename)
+    parser = Parser(src)
+    return parser.iter_parse()
+
+
+def parse_text(text, filename):
+    """parses the already read contents of a file"""
+    return parse(io.StringIO(text), filename)
+
+
+def _common_prefix_length(a, b, limit):
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix_length(a, b, limit):
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:] == b[len(b) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def reparse_source(previous, src):
+    """
+    parses src, the new text of a source previously parsed into previous, only reparsing the top level
+    declarations touched by the edit
+
+    declarations wholly before the edited range are moved over as they are, those wholly after it are shifted to
+    their new offsets. if the edit makes the reparsed range spill into its neighbours (an unterminated block,
+    string or comment) the whole source is parsed again instead
+    """
+    old_text = previous.lines.text
+    new_text = src.text
+    if previous.has_fatal_error():
+        return Parser(src).parse()
+
+    limit = min(len(old_text), len(new_text))
+    prefix = _common_prefix_length(old_text, new_text, limit)
+    suffix = _common_suffix_length(old_text, new_text, limit - prefix)
+    old_edit_end = len(old_text) - suffix
+    delta = len(new_text) - len(old_text)
+
+    # a declaration whose messages spill onto the next one (its extent overlaps its neighbour's) is never split
+    # from that neighbour, so each message is either moved over with its declaration or reported again
+    extents = previous.extents
+    head = 0
+    while head < len(extents) and extents[head][1] < prefix and (
+            head + 1 == len(extents) or extents[head][1] <= extents[head + 1][0]):
+        head += 1
+    tail = len(extents)
+    while tail > head and extents[tail - 1][0] > old_edit_end and (
+            tail - 1 == head or extents[tail - 2][1] <= extents[tail - 1][0]):
+        tail -= 1
+
+    if head > 0:
+        region_start = extents[head - 1][1]
+    else:
+        region_start = 0
+    if tail < len(extents):
+        old_region_end = extents[tail][0]
+    else:
+        old_region_end = len(old_text)
+
+    parser = Parser(src, region_start, old_region_end + delta)
+    region = parser.parse()
+    if not parser.ends_cleanly() or region.has_fatal_error():
+        return Parser(src).parse()
+
+    result = ParserResult(src.lines)
+    old_children = previous.ast.children
+    for index in range(head):
+        old_children[index].rebase(src.lines)
+        result.ast.add(old_children[index])
+        result.add_extent(*extents[index])
+    for child, extent in zip(region.ast.children, region.extents):
+        result.ast.add(child)
+        result.add_extent(*extent)
+    for index in range(tail, len(extents)):
+        old_children[index].rebase(src.lines, delta)
+        result.ast.add(old_children[index])
+        result.add_extent(extents[index][0] + delta, extents[index][1] + delta)
+
+    for message in previous.messages:
+        if message.origin.offset < region_start:
+            result.messages.append(message._replace(origin=src.lines.point(message.origin.offset)))
+    result.messages.extend(region.messages)
+    for message in previous.messages:
+        if message.origin.offset >= old_region_end:
+            result.messages.append(message._replace(origin=src.lines.point(message.origin.offset + delta)))
+    return result
+
+
+def reparse(previous, file, filename):
+    src = source.FileSource(file, filename)
+    return reparse_source(previous, src)
+
@@ -0,0 +1,322 @@
+"""
+this module provides streaming serialization of the abstract syntax tree for mog's custom language
+"""
+
+
+from . import ast
+from . import source
+import json
+
+
+def _attributes(node):
+    """the node's own attributes, with symbol IDs translated back to names"""
+    state = node.__getstate__()
+    return [
+        (attribute, value)
+        for attribute, value in state.items()
+        if attribute not in ast.STRUCTURAL_ATTRIBUTES
+    ]
+
+
+def _walk(root, depth=0):
+    """yields (node, depth) over the tree under root in pre-order, holding only a stack of pending siblings"""
+    stack = [(root, depth)]
+    while len(stack) > 0:
+        node, node_depth = stack.pop()
+        yield node, node_depth
+        children = node.children
+        for index in range(len(children) - 1, -1, -1):
+            stack.append((children[index], node_depth + 1))
+
+
+def dump_text(root, stream, indent=4, depth=0):
+    """writes the same human readable dump as Node.pretty_print to a text stream, a line at a time"""
+    for node, node_depth in _walk(root, depth):
+        stream.write("{}[{}:{}] {}\n".format(
+            indent * node_depth * " ",
+            node.origin.line, node.origin.column,
+            str(node)
+        ))
+
+
+def dump_json_lines(root, stream):
+    """
+    writes one JSON object per line to a text stream for each node, in pre-order, giving its depth, node class,
+    source position and attributes
+    """
+    for node, depth in _walk(root):
+        origin = node.origin
+        stream.write(json.dumps({
+            'depth': depth,
+            'kind': type(node).__name__,
+            'source': origin.source_name,
+            'offset': origin.offset,
+            'line': origin.line,
+            'column': origin.column,
+            'attributes': dict((attribute.lstrip('_'), value) for attribute, value in _attributes(node)),
+        }))
+        stream.write("\n")
+
+
+# the binary format is a magic number, then a sequence of records each starting with a tag byte. classes, sources
+# and strings are defined by a record the first time they are needed and referred to by index afterwards, every
+# node record gives its class, source, origin offset, number of children and attribute values, in pre-order. all
+# integers are unsigned LEB128 varints, signed ones zigzag encoded first, strings are a length and UTF-8 bytes
+BINARY_MAGIC = b'MOGAST\x00\x01'
+
+_TAG_END = 0
+_TAG_NODE = 1
+_TAG_CLASS = 2
+_TAG_SOURCE = 3
+_TAG_STRING = 4
+
+_VALUE_NONE = 0
+_VALUE_INT = 1
+_VALUE_STRING = 2
+_VALUE_TRUE = 3
+_VALUE_FALSE = 4
+
+_FLUSH_SIZE = 64 * 1024
+
+
+class BinaryFormatError(Exception):
+    pass
+
+
+def _write_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _write_bytes(buffer, data):
+    _write_varint(buffer, len(data))
+    buffer.extend(data)
+
+
+class BinaryWriter(object):
+    """writes trees in the compact binary format to a binary stream, buffering up to _FLUSH_SIZE bytes at a time"""
+
+    def __init__(self, stream, include_text=True):
+        self._stream = stream
+        self._include_text = include_text
+        self._buffer = bytearray(BINARY_MAGIC)
+        self._classes = {}
+        self._sources = {}
+        self._strings = {}
+
+    def _flush(self):
+        self._stream.write(bytes(self._buffer))
+        self._buffer.clear()
+
+    def _class_index(self, node):
+        node_class = type(node)
+        entry = self._classes.get(node_class)
+        if entry is None:
+            attributes = tuple(attribute for attribute, _ in _attributes(node))
+            entry = self._classes[node_class] = (len(self._classes), attributes)
+            self._buffer.append(_TAG_CLASS)
+            _write_bytes(self._buffer, node_class.__name__.encode('utf-8'))
+            _write_varint(self._buffer, len(attributes))
+            for attribute in attributes:
+                _write_bytes(self._buffer, attribute.encode('utf-8'))
+        return entry[0]
+
+    def _source_index(self, lines):
+        index = self._sources.get(lines)
+        if index is None:
+            index = self._sources[lines] = len(self._sources)
+            self._buffer.append(_TAG_SOURCE)
+            _write_bytes(self._buffer, lines.source_name.encode('utf-8'))
+            _write_bytes(self._buffer, lines.text.encode('utf-8') if self._include_text else b'')
+        return index
+
+    def _string_index(self, text):
+        index = self._strings.get(text)
+        if index is None:
+            index = self._strings[text] = len(self._strings)
+            self._buffer.append(_TAG_STRING)
+            _write_bytes(self._buffer, text.encode('utf-8'))
+        return index
+
+    def _write_value(self, value, node):
+        buffer = self._buffer
+        if value is None:
+            buffer.append(_VALUE_NONE)
+        elif value is True:
+            buffer.append(_VALUE_TRUE)
+        elif value is False:
+            buffer.append(_VALUE_FALSE)
+        elif isinstance(value, int):
+            buffer.append(_VALUE_INT)
+            _write_varint(buffer, value * 2 if value >= 0 else -value * 2 - 1)
+        elif isinstance(value, str):
+            buffer.append(_VALUE_STRING)
+            _write_varint(buffer, self._strings[value])
+        else:
+            raise TypeError("cannot serialize attribute value {!r} of {}".format(value, node))
+
+    def write(self, root):
+        for node, _ in _walk(root):
+            class_index = self._class_index(node)
+            source_index = self._source_index(node.origin.lines)
+            attributes = _attributes(node)
+            # strings are defined ahead of the node record that uses them
+            for _, value in attributes:
+                if isinstance(value, str):
+                    self._string_index(value)
+            buffer = self._buffer
+            buffer.append(_TAG_NODE)
+            _write_varint(buffer, class_index)
+            _write_varint(buffer, source_index)
+            _write_varint(buffer, node.origin.offset)
+            _write_varint(buffer, len(node.children))
+            for _, value in attributes:
+                self._write_value(value, node)
+            if len(buffer) >= _FLUSH_SIZE:
+                self._flush()
+
+    def close(self):
+        self._buffer.append(_TAG_END)
+        self._flush()
+
+
+def dump_binary(root, stream, include_text=True):
+    """
+    writes the tree under root to a binary stream in the compact binary format, the text of each source is
+    included unless include_text is False, in which case loaded nodes only know their origin's offset
+    """
+    writer = BinaryWriter(stream, include_text)
+    writer.write(root)
+    writer.close()
+
+
+class _BinaryReader(object):
+
+    def __init__(self, stream, chunk_size=_FLUSH_SIZE):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._buffer = b''
+        self._position = 0
+
+    def _fill(self, count):
+        if self._position + count > len(self._buffer):
+            chunks = [self._buffer[self._position:]]
+            available = len(chunks[0])
+            while available < count:
+                more = self._stream.read(max(self._chunk_size, count - available))
+                if len(more) == 0:
+                    raise BinaryFormatError("unexpected end of stream")
+                chunks.append(more)
+                available += len(more)
+            self._buffer = b''.join(chunks)
+            self._position = 0
+
+    def byte(self):
+        self._fill(1)
+        value = self._buffer[self._position]
+        self._position += 1
+        return value
+
+    def varint(self):
+        result = 0
+        shift = 0
+        while True:
+            value = self.byte()
+            result |= (value & 0x7f) << shift
+            if value < 0x80:
+                return result
+            shift += 7
+
+    def raw(self, count):
+        self._fill(count)
+        result = self._buffer[self._position:self._position + count]
+        self._position += count
+        return result
+
+    def text(self):
+        return self.raw(self.varint()).decode('utf-8')
+
+
+def _node_classes():
+    classes = {}
+    stack = [ast.Node]
+    while len(stack) > 0:
+        node_class = stack.pop()
+        classes[node_class.__name__] = node_class
+        stack.extend(node_class.__subclasses__())
+    return classes
+
+
+def load_binary(stream):
+    """reads a tree written by dump_binary back from a binary stream, returning its root node"""
+    reader = _BinaryReader(stream)
+    if reader.raw(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise BinaryFormatError("not a mog AST stream")
+
+    known_classes = _node_classes()
+    classes = []
+    sources = []
+    strings = []
+    root = None
+    # (node, number of children still to be read)
+    stack = []
+    while True:
+        tag = reader.byte()
+        if tag == _TAG_END:
+            break
+        elif tag == _TAG_CLASS:
+            name = reader.text()
+            if name not in known_classes:
+                raise BinaryFormatError("unknown node class '{}'".format(name))
+            attributes = [reader.text() for _ in range(reader.varint())]
+            classes.append((known_classes[name], attributes))
+        elif tag == _TAG_SOURCE:
+            source_name = reader.text()
+            sources.append(source.SourceLines(source_name, reader.text()))
+        elif tag == _TAG_STRING:
+            strings.append(reader.text())
+        elif tag == _TAG_NODE:
+            node_class, attributes = classes[reader.varint()]
+            lines = sources[reader.varint()]
+            offset = reader.varint()
+            child_count = reader.varint()
+            state = {'_origin': lines.point(offset), '_children': []}
+            for attribute in attributes:
+                value_type = reader.byte()
+                if value_type == _VALUE_NONE:
+                    value = None
+                elif value_type == _VALUE_TRUE:
+                    value = True
+                elif value_type == _VALUE_FALSE:
+                    value = False
+                elif value_type == _VALUE_INT:
+                    value = reader.varint()
+                    value = value >> 1 if value & 1 == 0 else -((value + 1) >> 1)
+                elif value_type == _VALUE_STRING:
+                    value = strings[reader.varint()]
+                else:
+                    raise BinaryFormatError("unknown value type {}".format(value_type))
+                state[attribute] = value
+            node = node_class.__new__(node_class)
+            node.__setstate__(state)
+
+            if len(stack) > 0:
+                parent, remaining = stack[-1]
+                parent.add(node)
+                if remaining == 1:
+                    stack.pop()
+                else:
+                    stack[-1] = (parent, remaining - 1)
+            elif root is None:
+                root = node
+            else:
+                raise BinaryFormatError("more than one root node")
+            if child_count > 0:
+                stack.append((node, child_count))
+        else:
+            raise BinaryFormatError("unknown record tag {}".format(tag))
+    if root is None or len(stack) > 0:
+        raise BinaryFormatError("truncated tree")
+    return root
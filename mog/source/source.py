@@ -3,12 +3,134 @@ this module provides the code source abstraction (for reading source code in)
 """
 
 
-import copy
+import bisect
+import re
+import string
+import sys
+
+
+class CharacterClass(object):
+    """a precomputed set of characters, along with its regular expression, for building the lexer's patterns"""
+
+    __slots__ = ('_characters', '_pattern')
+
+    def __init__(self, characters):
+        self._characters = frozenset(characters)
+        self._pattern = "[{}]".format(re.escape("".join(sorted(self._characters))))
+
+    @property
+    def pattern(self):
+        """the character class in regular expression syntax, for building larger patterns"""
+        return self._pattern
+
+    def __contains__(self, char):
+        return char in self._characters
+
+    def __or__(self, other):
+        return CharacterClass(self._characters | other._characters)
+
+
+DIGITS = CharacterClass(string.digits)
+IDENTIFIER_START = CharacterClass(string.ascii_letters + "_")
+IDENTIFIER = IDENTIFIER_START | DIGITS
+
+
+class SourceLines(object):
+    """
+    the per-file table of line start offsets, shared by every point in that file
+
+    the table is only built the first time a line or column is actually asked for (usually when a message
+    is printed), so reading and parsing never pay for line tracking
+    """
+
+    __slots__ = ('_source_name', '_text', '_starts')
+
+    def __init__(self, source_name, text=""):
+        self._source_name = sys.intern(source_name)
+        self._text = text
+        self._starts = None
+
+    @property
+    def source_name(self):
+        return self._source_name
+
+    @property
+    def text(self):
+        return self._text
+
+    def _line_starts(self):
+        if self._starts is None:
+            starts = [0]
+            index = self._text.find('\n')
+            while index != -1:
+                starts.append(index + 1)
+                index = self._text.find('\n', index + 1)
+            self._starts = starts
+        return self._starts
+
+    def line_of(self, offset):
+        return bisect.bisect_right(self._line_starts(), offset) - 1
+
+    def column_of(self, offset):
+        starts = self._line_starts()
+        return offset - starts[bisect.bisect_right(starts, offset) - 1]
+
+    def point(self, offset):
+        return SourcePoint(self, offset)
 
 
 class SourcePoint(object):
+    """an immutable position within a source, safe to share between nodes and messages without copying"""
+
+    __slots__ = ('_lines', '_offset')
 
-    def __init__(self, source_name, line=0, column=0):
+    def __init__(self, lines, offset=0):
+        self._lines = lines
+        self._offset = offset
+
+    @property
+    def lines(self):
+        return self._lines
+
+    @property
+    def source_name(self):
+        return self._lines.source_name
+
+    @property
+    def offset(self):
+        return self._offset
+
+    @property
+    def line(self):
+        return self._lines.line_of(self._offset)
+
+    @property
+    def column(self):
+        return self._lines.column_of(self._offset)
+
+    def __eq__(self, other):
+        return isinstance(other, SourcePoint) and self._lines is other._lines and self._offset == other._offset
+
+    def __hash__(self):
+        return hash((self._lines, self._offset))
+
+    def __str__(self):
+        return "{} [line {}, char {}]".format(self.source_name, self.line + 1, self.column + 1)
+
+    def location(self):
+        """this position as a SourceLocation, which does not hold on to the text of its source"""
+        return SourceLocation(self.source_name, self.line, self.column)
+
+
+class SourceLocation(object):
+    """
+    an immutable position given by its source's name, line and column only, for positions sent to another
+    process, where pickling a SourcePoint would send the whole text of its source along
+    """
+
+    __slots__ = ('_source_name', '_line', '_column')
+
+    def __init__(self, source_name, line, column):
         self._source_name = source_name
         self._line = line
         self._column = column
@@ -25,58 +147,62 @@ class SourcePoint(object):
     def column(self):
         return self._column
 
-    def clone(self):
-        return copy.copy(self)
+    def location(self):
+        return self
 
-    def advance_by(self, letter):
-        if letter == '\n':
-            self._line += 1
-            self._column = 0
-            result = True
-        else:
-            self._column += 1
-            result = False
-        return result
+    def __eq__(self, other):
+        return (
+            isinstance(other, SourceLocation) and self._source_name == other._source_name
+            and self._line == other._line and self._column == other._column
+        )
 
-    def rewind_by(self, letter, last_column=0):
-        if letter == '\n':
-            self._column = last_column
-            self._line -= 1
-        else:
-            self._column -= 1
+    def __hash__(self):
+        return hash((self._source_name, self._line, self._column))
 
+    def __str__(self):
+        return "{} [line {}, char {}]".format(self.source_name, self.line + 1, self.column + 1)
 
-class AbstractSource(object):
 
-    def __init__(self, source_name):
-        self._position = SourcePoint(source_name)
-        self._buffered = ""
+class AbstractSource(object):
+    """
+    a source holding the entire text in memory, walked with an integer cursor
 
-    def _read(self, amount):
-        _ = self, amount
-        raise RuntimeError("abstract read not implemented")
+    subclasses only decide where the text comes from, it is read exactly once on construction so that
+    peek/get/put never copy or concatenate strings
+    """
 
-    def _fill_buffer(self, capacity=1024):
-        missing = capacity - len(self._buffered)
-        if missing > 0:
-            self._buffered += self._read(missing)
+    def __init__(self, source_name, text):
+        self._lines = SourceLines(source_name, text)
+        self._text = text
+        self._length = len(text)
+        self._cursor = 0
 
     @property
     def position(self):
-        return self._position.clone()
+        return SourcePoint(self._lines, self._cursor)
+
+    @property
+    def lines(self):
+        return self._lines
 
     @property
     def source_name(self):
-        return self.position.source_name
+        return self._lines.source_name
+
+    @property
+    def text(self):
+        return self._text
+
+    @property
+    def offset(self):
+        return self._cursor
 
     def is_eof(self):
-        self._fill_buffer()
-        return len(self._buffered) < 1
+        return self._cursor >= self._length
 
     def peek(self):
-        self._fill_buffer()
-        if len(self._buffered) > 0:
-            result = self._buffered[0]
+        if self._cursor < self._length:
+            result = self._text[self._cursor]
         else:
             result = None
         return result
@@ -84,33 +210,27 @@ class AbstractSource(object):
     def get(self):
         result = self.peek()
         if result is not None:
-            self._position.advance_by(result)
-            self._buffered = self._buffered[1:]
+            self._cursor += 1
         return result
 
     def put(self, contents):
-        for letter in contents:
-            self._position.rewind_by(letter)
-        self._buffered = contents + self._buffered
+        start = self._cursor - len(contents)
+        if start < 0 or self._text[start:self._cursor] != contents:
+            # putting back something other than what was read, splice it in at the cursor (slow path)
+            self._text = self._text[:self._cursor] + contents + self._text[self._cursor:]
+            self._length = len(self._text)
+            self._lines = SourceLines(self._lines.source_name, self._text)
+            start = self._cursor
+        self._cursor = start
 
 
 class TextSource(AbstractSource):
 
     def __init__(self, text, source_name="<text source>"):
-        super().__init__(source_name)
-        self._text = text.encode()
-
-    def _read(self, amount):
-        result = self._text[:amount]
-        self._text = self._text[amount:]
-        return result
+        super().__init__(source_name, text)
 
 
 class FileSource(AbstractSource):
 
     def __init__(self, file, filename):
-        super().__init__("file '{}'".format(filename))
-        self._file = file
-
-    def _read(self, amount):
-        return self._file.read(amount)
+        super().__init__("file '{}'".format(filename), file.read())
@@ -0,0 +1,47 @@
+"""
+this module provides the project wide symbol table, which interns every name used in mog's custom language once
+"""
+
+
+class SymbolTable(object):
+    """
+    interns names, handing out a compact integer ID for each distinct name
+
+    the AST and the transpiler's type tables store these IDs rather than names, so that a name such as 'x' used by
+    thousands of objects is held once, and lookups hash a small integer rather than a string. IDs are only
+    meaningful within one process, anything pickled (cached parser results, results from worker processes) is
+    translated back to names and re-interned when loaded. None is passed through unchanged, for optional names
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._names = []
+
+    def intern(self, name):
+        """returns the ID of name, allocating one if name has not been seen before"""
+        if name is None:
+            return None
+        symbol = self._ids.get(name)
+        if symbol is None:
+            symbol = len(self._names)
+            self._ids[name] = symbol
+            self._names.append(name)
+        return symbol
+
+    def lookup(self, name):
+        """returns the ID of name, or None if it has never been interned"""
+        return self._ids.get(name)
+
+    def name(self, symbol):
+        if symbol is None:
+            return None
+        return self._names[symbol]
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def __len__(self):
+        return len(self._names)
+
+
+SYMBOLS = SymbolTable()
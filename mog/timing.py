@@ -0,0 +1,112 @@
+"""
+this module provides the recording of build timings and counters, per phase and per file or object within a phase
+"""
+
+
+import contextlib
+import json
+import time
+
+
+class Span(object):
+    """measures the wall clock and CPU (of this process) time from its creation until stop"""
+
+    def __init__(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def stop(self):
+        """returns the (wall, cpu) seconds elapsed"""
+        return time.perf_counter() - self._wall, time.process_time() - self._cpu
+
+
+def _add_counters(counters, more):
+    for name, amount in more.items():
+        counters[name] = counters.get(name, 0) + amount
+
+
+class Timings(object):
+    """
+    the wall clock and CPU time, and counters, of each phase of a build, in the order the phases first happened
+
+    a phase is timed as a whole by the process running the build, and may also have items (a file, an object),
+    each timed wherever it ran, possibly a worker process, so the CPU time of a phase is that of the building
+    process only while item_cpu sums the CPU time of its items. counters given for an item are added into its
+    phase's counters too
+    """
+
+    def __init__(self):
+        self._span = Span()
+        self._total = None
+        self._phases = {}
+
+    def _phase(self, name):
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = {
+                'wall': 0.0, 'cpu': 0.0, 'item_wall': 0.0, 'item_cpu': 0.0, 'counters': {}, 'items': {},
+            }
+        return phase
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """times the body of a with statement as part of the named phase"""
+        phase = self._phase(name)
+        span = Span()
+        try:
+            yield
+        finally:
+            wall, cpu = span.stop()
+            phase['wall'] += wall
+            phase['cpu'] += cpu
+
+    def count(self, phase_name, counter, amount=1):
+        counters = self._phase(phase_name)['counters']
+        counters[counter] = counters.get(counter, 0) + amount
+
+    def add_item(self, phase_name, item_name, wall, cpu, counters=None):
+        phase = self._phase(phase_name)
+        item = phase['items'].get(item_name)
+        if item is None:
+            item = phase['items'][item_name] = {'wall': 0.0, 'cpu': 0.0, 'counters': {}}
+        item['wall'] += wall
+        item['cpu'] += cpu
+        phase['item_wall'] += wall
+        phase['item_cpu'] += cpu
+        if counters is not None:
+            _add_counters(item['counters'], counters)
+            _add_counters(phase['counters'], counters)
+
+    def merge(self, other, item_name):
+        """adds each phase of other, timed elsewhere (such as in a worker process), as an item named item_name"""
+        for name, phase in other._phases.items():
+            self.add_item(name, item_name, phase['wall'], phase['cpu'], phase['counters'])
+
+    def stop(self):
+        """ends the build's total time"""
+        self._total = self._span.stop()
+
+    def to_json(self):
+        total = self._total if self._total is not None else self._span.stop()
+        return {
+            'total': {'wall': total[0], 'cpu': total[1]},
+            'phases': [
+                {
+                    'name': name,
+                    'wall': phase['wall'],
+                    'cpu': phase['cpu'],
+                    'item_wall': phase['item_wall'],
+                    'item_cpu': phase['item_cpu'],
+                    'counters': phase['counters'],
+                    'items': [
+                        dict(name=item_name, **item)
+                        for item_name, item in phase['items'].items()
+                    ],
+                }
+                for name, phase in self._phases.items()
+            ],
+        }
+
+    def save(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.to_json(), file, indent=2)
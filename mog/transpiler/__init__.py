@@ -4,8 +4,26 @@ this package provides the the custom language transpiling within mog
 
 
 from .. import gamemaker
+from .. import timing
 from ..source import ast as astree
+from ..source import operators
+from ..source import symbols
+from . import dependencies
+from . import folding
+from . import passes
+from . import usage
 from collections import namedtuple
+import concurrent.futures
+
+
+# bump whenever the generated code changes, so incremental builds regenerate every object
+TRANSPILER_VERSION = 3
+
+# optimization passes run at this level and below unless asked otherwise
+DEFAULT_OPT_LEVEL = 1
+
+# indexing binds like member access, as it is parsed
+INDEX_PRIORITY = operators.OPERATORS.infix('.').precedence
 
 
 class TranspilerMessage(namedtuple('TranspilerMessage', 'type contents origin')):
@@ -54,16 +72,20 @@ class FatalTranspilerError(Exception):
 class DeclarationInfo(object):
 
     def __init__(self, name, ast):
-        self._name = name
+        self._symbol = symbols.SYMBOLS.intern(name)
         self._ast = ast
 
     @property
     def name(self):
-        return self._name
+        return symbols.SYMBOLS.name(self._symbol)
+
+    @property
+    def symbol(self):
+        return self._symbol
 
     @property
     def origin(self):
-        return self._ast.origin.clone()
+        return self._ast.origin
 
     @property
     def ast(self):
@@ -73,17 +95,28 @@ class DeclarationInfo(object):
 class Type(object):
 
     def __init__(self, name):
-        self._name = name
+        self._symbol = symbols.SYMBOLS.intern(name)
 
     @property
     def name(self):
-        return self._name
+        return symbols.SYMBOLS.name(self._symbol)
+
+    @property
+    def symbol(self):
+        return self._symbol
 
     def __str__(self):
         return "type '{}'".format(self.name)
 
 
 class RecordType(Type):
+    """
+    members and methods are keyed by their symbol ID (see mog.source.symbols), the *_names properties are the
+    corresponding names, for display
+
+    once parents are set, flatten() builds the visible tables: every member and method the type has, declared or
+    inherited, mapped to the type declaring it, so resolving a name costs one lookup however deep the hierarchy
+    """
 
     def __init__(self, name, origin):
         super().__init__(name)
@@ -91,6 +124,8 @@ class RecordType(Type):
         self._members = {}
         self._methods = {}
         self._parent = None
+        self._visible_members = None
+        self._visible_methods = None
 
     def set_parent(self, parent):
         self._parent = parent
@@ -101,27 +136,93 @@ class RecordType(Type):
 
     @property
     def origin(self):
-        return self._origin.clone()
+        return self._origin
 
     @property
-    def member_names(self):
+    def member_symbols(self):
         return self._members.keys()
 
-    def member_info(self, field_name):
-        return self._members[field_name]
+    @property
+    def member_names(self):
+        return [symbols.SYMBOLS.name(symbol) for symbol in self._members]
+
+    def has_member(self, symbol):
+        return symbol in self._members
+
+    def member_info(self, symbol):
+        return self._members[symbol]
 
     def add_member(self, field_info):
-        self._members[field_info.name] = field_info
+        self._members[field_info.symbol] = field_info
 
     @property
-    def method_names(self):
+    def method_symbols(self):
         return self._methods.keys()
 
-    def method_info(self, method_name):
-        return self._methods[method_name]
+    @property
+    def method_names(self):
+        return [symbols.SYMBOLS.name(symbol) for symbol in self._methods]
+
+    def has_method(self, symbol):
+        return symbol in self._methods
+
+    def method_info(self, symbol):
+        return self._methods[symbol]
 
     def add_method(self, method_info):
-        self._methods[method_info.name] = method_info
+        self._methods[method_info.symbol] = method_info
+
+    @staticmethod
+    def _flatten_table(parent_table, own_table, declaring_type):
+        if parent_table is None:
+            table = {}
+        else:
+            table = parent_table.copy()
+        for symbol in own_table:
+            table[symbol] = declaring_type
+        return table
+
+    def flatten(self):
+        """builds the visible tables of this type, its parent's must already have been built"""
+        parent = self._parent
+        self._visible_members = self._flatten_table(
+            None if parent is None else parent._visible_members, self._members, self
+        )
+        self._visible_methods = self._flatten_table(
+            None if parent is None else parent._visible_methods, self._methods, self
+        )
+
+    @property
+    def is_flattened(self):
+        return self._visible_members is not None
+
+    @property
+    def visible_member_symbols(self):
+        return self._visible_members.keys()
+
+    def member_declared_by(self, symbol):
+        """the type declaring the member visible in this type as symbol, or None if there is no such member"""
+        return self._visible_members.get(symbol)
+
+    def resolve_member(self, symbol):
+        """the declaration info of the member visible in this type as symbol, or None if there is no such member"""
+        declaring_type = self._visible_members.get(symbol)
+        if declaring_type is None:
+            return None
+        return declaring_type._members[symbol]
+
+    @property
+    def visible_method_symbols(self):
+        return self._visible_methods.keys()
+
+    def method_declared_by(self, symbol):
+        return self._visible_methods.get(symbol)
+
+    def resolve_method(self, symbol):
+        declaring_type = self._visible_methods.get(symbol)
+        if declaring_type is None:
+            return None
+        return declaring_type._methods[symbol]
 
     def __str__(self):
         parent = ""
@@ -167,19 +268,53 @@ class MemberDeclarationInfo(DeclarationInfo):
 
 class ObjectType(RecordType):
 
-    def __init__(self, name, origin):
+    def __init__(self, name, origin, ast=None):
         super().__init__(name, origin)
+        self._ast = ast
         self._events = {}
+        self._visible_events = None
 
     @property
-    def event_names(self):
+    def ast(self):
+        """the ObjectNode declaring this object"""
+        return self._ast
+
+    @property
+    def event_symbols(self):
         return self._events.keys()
 
-    def event_info(self, event_name):
-        return self._events[event_name]
+    @property
+    def event_names(self):
+        return [symbols.SYMBOLS.name(symbol) for symbol in self._events]
+
+    def has_event(self, symbol):
+        return symbol in self._events
+
+    def event_info(self, symbol):
+        return self._events[symbol]
 
     def add_event(self, event_info):
-        self._events[event_info.name] = event_info
+        self._events[event_info.symbol] = event_info
+
+    def flatten(self):
+        super().flatten()
+        parent = self._parent
+        self._visible_events = self._flatten_table(
+            None if parent is None else parent._visible_events, self._events, self
+        )
+
+    @property
+    def visible_event_symbols(self):
+        return self._visible_events.keys()
+
+    def event_declared_by(self, symbol):
+        return self._visible_events.get(symbol)
+
+    def resolve_event(self, symbol):
+        declaring_type = self._visible_events.get(symbol)
+        if declaring_type is None:
+            return None
+        return declaring_type._events[symbol]
 
     def __str__(self):
         parent = ""
@@ -208,37 +343,118 @@ class ObjectType(RecordType):
         )
 
 
+class _TypeDefinitionVisitor(astree.Visitor):
+    """finds the type declarations in a tree, without descending into them"""
+
+    def __init__(self, transpiler):
+        super().__init__()
+        self._transpiler = transpiler
+
+    def visit_ObjectNode(self, node):
+        self._transpiler._ingest_object_definition(node)
+        return astree.Visitor.PRUNE
+
+    def visit_Node(self, node):
+        if self.depth > 0:
+            return astree.Visitor.PRUNE
+
+
+class _ObjectDefinitionVisitor(astree.Visitor):
+    """ingests the events, methods and members declared in an object"""
+
+    def __init__(self, transpiler, obj):
+        super().__init__()
+        self._transpiler = transpiler
+        self._obj = obj
+
+    def visit_EventNode(self, node):
+        self._transpiler.ingest_event_definition(self._obj, node)
+        return astree.Visitor.PRUNE
+
+    def visit_MethodNode(self, node):
+        self._transpiler._ingest_method_definition(self._obj, node)
+        return astree.Visitor.PRUNE
+
+    def visit_MemberNode(self, node):
+        self._transpiler._ingest_member_definition(self._obj, node)
+        return astree.Visitor.PRUNE
+
+    def visit_Node(self, node):
+        if self.depth > 0:
+            return astree.Visitor.PRUNE
+
+
 class Transpiler(object):
 
     def __init__(self, project_name):
         self._ast = astree.RootNode("mog project '{}'".format(project_name))
         self._messages = []
+        # keyed by the symbol ID of the type name
         self._types = {}
-        self._delayed = {}
-        self._stage_order = [
-            'object-parenting',
-        ]
-        for stage in self._stage_order:
-            self._delayed[stage] = []
-
-    def _register_delay(self, stage_name, callback):
-        if stage_name not in self._delayed:
-            self._delayed[stage_name] = []
-        self._delayed[stage_name].append(callback)
-
-    def _trigger_delays(self, stage_name, *args):
-        for delay in self._delayed[stage_name]:
-            delay(*args)
+        # (object type, symbol ID of its parent's name), resolved by the object-parenting pass once every object
+        # has been ingested
+        self._pending_parents = []
+        self._compiled_objects = []
+        self._timings = timing.Timings()
+        self._passes = passes.PassManager()
+        self._add_passes()
+
+    def _add_passes(self):
+        """
+        adds the passes of compilation, those above constant-folding only analyse, results provided by compile
+        are 'gm-project', 'previous-graph', 'jobs' and 'opt-level'
+        """
+        self._passes.add(passes.Pass(
+            'object-parenting', Transpiler._parenting_pass,
+            outputs=['parenting']
+        ))
+        self._passes.add(passes.Pass(
+            'inheritance-tables', Transpiler._inheritance_tables_pass,
+            inputs=['parenting'], outputs=['inheritance-tables']
+        ))
+        self._passes.add(passes.Pass(
+            'dead-code', Transpiler._dead_code_pass,
+            inputs=['inheritance-tables'], outputs=['dead-code'], opt_level=1
+        ))
+        self._passes.add(passes.Pass(
+            'dependency-graph', Transpiler._dependency_graph_pass,
+            inputs=['inheritance-tables', 'opt-level'], outputs=['dependency-graph'], optional_inputs=['dead-code']
+        ))
+        self._passes.add(passes.Pass(
+            'select-objects', Transpiler._select_objects_pass,
+            inputs=['dependency-graph', 'gm-project', 'previous-graph'], outputs=['objects-to-compile']
+        ))
+        self._passes.add(passes.Pass(
+            'constant-folding', Transpiler._constant_folding_pass,
+            inputs=['objects-to-compile'], outputs=['folded-constants'], opt_level=1
+        ))
+        self._passes.add(passes.Pass(
+            'code-generation', Transpiler._code_generation_pass,
+            inputs=['inheritance-tables', 'objects-to-compile', 'gm-project', 'jobs'], outputs=['compiled-objects'],
+            optional_inputs=['dead-code', 'folded-constants']
+        ))
 
-    def _delay_object_parenting(self, callback):
-        self._register_delay('object-parenting', callback)
+    @property
+    def passes(self):
+        """the pass manager, further passes can be added to it before compiling"""
+        return self._passes
 
     @property
     def messages(self):
         return self._messages
 
+    @property
+    def dependency_graph(self):
+        """the dependency graph built by the last compile, to be handed to the next one"""
+        return self._passes.result('dependency-graph')
+
+    @property
+    def compiled_objects(self):
+        """the names of the objects the last compile regenerated"""
+        return self._compiled_objects
+
     def report(self, message_type, contents, origin):
-        self._messages.append(TranspilerMessage(message_type, contents, origin.clone()))
+        self._messages.append(TranspilerMessage(message_type, contents, origin))
 
     def verbose(self, contents, origin):
         self.report(TranspilerMessage.VERBOSE, contents, origin)
@@ -264,77 +480,342 @@ class Transpiler(object):
             for message in self.messages
         ])
 
-    def _parent_objects(self, child, parent_name):
-        if parent_name in self._types and isinstance(self._types[parent_name], ObjectType):
-            child.set_parent(self._types[parent_name])
+    def _parent_objects(self, child, parent_symbol):
+        if parent_symbol in self._types and isinstance(self._types[parent_symbol], ObjectType):
+            child.set_parent(self._types[parent_symbol])
         else:
-            self.error("parent type {} does not exist".format(parent_name), child.origin)
+            self.error("parent type {} does not exist".format(symbols.SYMBOLS.name(parent_symbol)), child.origin)
 
     def ingest_event_definition(self, parent, event_ast):
-        if event_ast.event_name in parent.event_names:
+        if parent.has_event(event_ast.event_name_symbol):
             self.error("object {} already has event definition for {} at {}".format(
-                parent.name, event_ast.event_name, parent.event_info(event_ast.event_name).origin
+                parent.name, event_ast.event_name, parent.event_info(event_ast.event_name_symbol).origin
             ), event_ast.origin)
         else:
             parent.add_event(EventDeclarationInfo(event_ast.event_name, event_ast))
 
     def _ingest_method_definition(self, parent, method_ast):
-        if method_ast.name in parent.method_names:
+        if parent.has_method(method_ast.name_symbol):
             self.error("object {} already has method definition for {} at {}".format(
-                parent.name, method_ast.name, parent.method_info(method_ast.name).origin
+                parent.name, method_ast.name, parent.method_info(method_ast.name_symbol).origin
             ), method_ast.origin)
         else:
             parent.add_method(MethodDeclarationInfo(method_ast.name, method_ast))
 
     def _ingest_member_definition(self, parent, member_ast):
-        if member_ast.name in parent.member_names:
-            self.error("object {} already has method definition for {} at {}".format(
-                parent.name, member_ast.name, parent.method_info(member_ast.name).origin
+        if parent.has_member(member_ast.name_symbol):
+            self.error("object {} already has member definition for {} at {}".format(
+                parent.name, member_ast.name, parent.member_info(member_ast.name_symbol).origin
             ), member_ast.origin)
         else:
             parent.add_member(MemberDeclarationInfo(member_ast.name, member_ast))
 
     def _ingest_object_definition(self, object_ast):
-        obj = ObjectType(object_ast.name, object_ast.origin)
-        if obj.name in self._types:
-            existing_definition = self._types[obj.name].origin
-            self.error("object with name {} already defined at {}".format(existing_definition), object_ast.origin)
+        obj = ObjectType(object_ast.name, object_ast.origin, object_ast)
+        if obj.symbol in self._types:
+            existing_definition = self._types[obj.symbol].origin
+            self.error("object with name {} already defined at {}".format(obj.name, existing_definition), object_ast.origin)
         else:
-            self._types[obj.name] = obj
-            if object_ast.parent_name is not None:
-                self._delay_object_parenting(lambda transpiler: transpiler._parent_objects(obj, object_ast.parent_name))
-            for child in object_ast.children:
-                if isinstance(child, astree.EventNode):
-                    self.ingest_event_definition(obj, child)
-                elif isinstance(child, astree.MethodNode):
-                    self._ingest_method_definition(obj, child)
-                elif isinstance(child, astree.MemberNode):
-                    self._ingest_member_definition(obj, child)
+            self._types[obj.symbol] = obj
+            if object_ast.parent_name_symbol is not None:
+                self._pending_parents.append((obj, object_ast.parent_name_symbol))
+            _ObjectDefinitionVisitor(self, obj).walk(object_ast)
+
+    def _flatten_inheritance(self):
+        """
+        builds the visible tables of every record type, each type's ancestors first, breaking any inheritance cycle
+        (reporting an error) at the type whose parent closes it
+        """
+        flattened = set()
+        for record in self._types.values():
+            if not isinstance(record, RecordType):
+                continue
+            chain = []
+            on_chain = set()
+            current = record
+            while current is not None and current not in flattened:
+                if current in on_chain:
+                    last = chain[-1]
+                    cycle = chain[chain.index(current):] + [current]
+                    self.error("object {} inherits from itself ({})".format(
+                        last.name, " -> ".join(member.name for member in cycle)
+                    ), last.origin)
+                    last.set_parent(None)
+                    break
+                chain.append(current)
+                on_chain.add(current)
+                current = current.parent
+            for member in reversed(chain):
+                member.flatten()
+                flattened.add(member)
 
     def identify_types_in(self, ast):
-        for child in ast.children:
-            if isinstance(child, astree.ObjectNode):
-                self._ingest_object_definition(child)
+        _TypeDefinitionVisitor(self).walk(ast)
+
+    def ingest_declaration(self, declaration):
+        """
+        ingests a single top level declaration, identifying any type it declares straight away, so declarations
+        can be fed in one at a time as a streaming parse (mog.source.parser.iter_parse) completes them
+        """
+        self._ast.add(declaration)
+        self.identify_types_in(declaration)
 
     def ingest_ast(self, ast):
         for child in ast.children:
-            self._ast.add(child)
+            self.ingest_declaration(child)
+
+    def _code_job(self, obj, gm_project, dead_code=None):
+        events = []
+        for event_symbol in obj.event_symbols:
+            event_decl = obj.event_info(event_symbol)
+            event_name = event_decl.name
+            if event_name not in EVENT_NAME_MAPPING:
+                self.error("'{}' is not a valid event name".format(event_name), event_decl.origin)
+                continue
+            event_type, event_number = EVENT_NAME_MAPPING[event_name]
+            events.append((event_name, event_type, event_number, event_decl.ast.code_block))
+        unread_members = set()
+        if dead_code is not None:
+            unread_members.update(dead_code.unread_members(obj))
+            for method_symbol in dead_code.uncalled_methods(obj):
+                method_info = obj.method_info(method_symbol)
+                self.info("method '{}' of {} is never called, it is not emitted".format(
+                    method_info.name, obj.name
+                ), method_info.origin)
+        members = []
+        for member_symbol in obj.member_symbols:
+            member_info = obj.member_info(member_symbol)
+            if member_symbol in unread_members:
+                self.info("member '{}' of {} is never read, its initialization is left out".format(
+                    member_info.name, obj.name
+                ), member_info.origin)
+                continue
+            members.append((member_info.name, member_info.origin, member_info.ast.type, member_info.ast.expression))
+        return ObjectCodeJob(
+            obj.name, gm_project.base_path, gm_project.object_path(obj.name), events, members
+        )
+
+    @staticmethod
+    def _graph_version(opt_level):
+        """the version of the dependency graph, the same code is only generated by the same version and opt level"""
+        return "{}-O{}".format(TRANSPILER_VERSION, opt_level)
+
+    def _build_dependency_graph(self, opt_level=DEFAULT_OPT_LEVEL, dead_code=None):
+        graph = dependencies.DependencyGraph(Transpiler._graph_version(opt_level))
+        method_declarers = {}
+        for obj in self._types.values():
+            if isinstance(obj, ObjectType):
+                for method_symbol in obj.method_symbols:
+                    method_declarers.setdefault(method_symbol, []).append(obj)
+        for obj in self._types.values():
+            if isinstance(obj, ObjectType):
+                dependencies.DependencyCollector(graph, obj, self._types, method_declarers).collect()
+                if dead_code is not None:
+                    graph.set_removed(obj.name, [
+                        "member {}".format(symbols.SYMBOLS.name(symbol)) for symbol in dead_code.unread_members(obj)
+                    ] + [
+                        "method {}".format(symbols.SYMBOLS.name(symbol)) for symbol in dead_code.uncalled_methods(obj)
+                    ])
+        return graph
+
+    def _objects_to_compile(self, gm_project, previous_graph):
+        """
+        the objects to regenerate: all of them without a usable previous graph, otherwise those whose declaration
+        changed (or that are new, removed or missing from the game maker project) and everything depending on them
+        """
+        objects = [obj for obj in self._types.values() if isinstance(obj, ObjectType)]
+        graph = self.dependency_graph
+        if previous_graph is None or previous_graph.version != graph.version:
+            return objects
+        changed = graph.changed_objects(previous_graph)
+        changed.update(name for name in previous_graph.object_names if name not in graph.object_names)
+        changed.update(obj.name for obj in objects if not gm_project.has_object(obj.name))
+        affected = graph.affected_objects(previous_graph, changed)
+        return [obj for obj in objects if obj.name in affected]
+
+    def _compile_objects(self, gm_project, objects, jobs=1, dead_code=None):
+        """
+        generates and writes the code of each object, across jobs worker processes if more than one
+
+        each object's messages, those from preparing its job and then those from running it, are reported in the
+        order of objects whatever order the workers finish in, so the output is the same for any number of jobs
+        """
+        prepared = []
+        for obj in objects:
+            first = len(self._messages)
+            job = self._code_job(obj, gm_project, dead_code)
+            prepared.append((job, self._messages[first:]))
+            del self._messages[first:]
+
+        code_jobs = [job for job, _ in prepared]
+        if jobs > 1 and len(code_jobs) > 1:
+            chunk_size = max(1, len(code_jobs) // (jobs * 4))
+            with concurrent.futures.ProcessPoolExecutor(jobs) as pool:
+                results = list(pool.map(run_code_job, [job.detached() for job in code_jobs], chunksize=chunk_size))
+        else:
+            results = map(run_code_job, code_jobs)
+
+        for (job, job_messages), (generator_messages, job_timings) in zip(prepared, results):
+            self._messages.extend(job_messages)
+            self._messages.extend(generator_messages)
+            self._compiled_objects.append(job.name)
+            self._timings.merge(job_timings, job.name)
+        self._timings.count('code-generation', 'objects', len(code_jobs))
+
+    def _parenting_pass(self, results):
+        for obj, parent_symbol in self._pending_parents:
+            self._parent_objects(obj, parent_symbol)
+
+    def _inheritance_tables_pass(self, results):
+        self._flatten_inheritance()
+
+    def _dead_code_pass(self, results):
+        objects = [obj for obj in self._types.values() if isinstance(obj, ObjectType)]
+        return {'dead-code': usage.UsageAnalysis(objects).run()}
+
+    def _dependency_graph_pass(self, results):
+        return {'dependency-graph': self._build_dependency_graph(results['opt-level'], results['dead-code'])}
+
+    def _select_objects_pass(self, results):
+        return {'objects-to-compile': self._objects_to_compile(results['gm-project'], results['previous-graph'])}
+
+    def _constant_folding_pass(self, results):
+        folded = 0
+        for obj in results['objects-to-compile']:
+            folded += folding.fold(obj.ast)
+        self._timings.count('constant-folding', 'operators', folded)
+
+    def _code_generation_pass(self, results):
+        self._compile_objects(
+            results['gm-project'], results['objects-to-compile'], results['jobs'], results['dead-code']
+        )
+
+    def compile(self, gm_project, previous_graph=None, jobs=1, opt_level=DEFAULT_OPT_LEVEL, timings=None):
+        """
+        compiles the ingested objects into gm_project by running the passes scheduled at opt_level. given the
+        dependency graph of the previous build only the objects affected by what has changed since are
+        regenerated, the code of each object is generated and written across jobs worker processes. each pass,
+        and each object's code generation, is timed into timings if given
+        """
+        self._timings = timings if timings is not None else timing.Timings()
+        self._compiled_objects = []
+        self._passes.reset()
+        self._passes.provide('gm-project', gm_project)
+        self._passes.provide('previous-graph', previous_graph)
+        self._passes.provide('jobs', jobs)
+        self._passes.provide('opt-level', opt_level)
+        try:
+            self._passes.run(self, opt_level, self._timings)
+        except FatalTranspilerError as err:
+            self._fatal_error(err.contents, err.origin)
+
+    def debug_types(self):
+        print("debug transpiler type information:")
+        for info in self._types.values():
+            print("  {}".format(info))
+
+
+class ObjectCodeJob(namedtuple('ObjectCodeJob', 'name base_path gm_path events members')):
+    """
+    everything needed to generate and write the code of one object, gm_path being its game maker object file
+    (None for a new object), events (name, event type, event number, code block) tuples and members
+    (name, origin, type, expression) tuples
+
+    jobs carry names and AST nodes only, which survive being sent to a worker process, unlike symbol IDs
+    """
+
+    def detached(self):
+        """
+        this job with its AST nodes and origins detached from the source text (see Node.detached), so sending it to
+        a worker process costs about as much as the object's own code rather than every source file it touches
+        """
+        def detached(node):
+            return node.detached() if node is not None else None
+
+        return self._replace(
+            events=[
+                (event_name, event_type, event_number, detached(code_block))
+                for event_name, event_type, event_number, code_block in self.events
+            ],
+            members=[
+                (member_name, origin.location(), detached(type_ast), detached(expression_ast))
+                for member_name, origin, type_ast, expression_ast in self.members
+            ]
+        )
+
+
+class CodeGenerator(object):
+    """
+    generates the GML code of one object from an ObjectCodeJob and writes it into the object's game maker file
+
+    messages are collected rather than reported to a transpiler, so a generator can run in a worker process
+    """
+
+    def __init__(self, job):
+        self._job = job
+        self._messages = []
+        self._timings = timing.Timings()
+
+    @property
+    def messages(self):
+        return self._messages
+
+    @property
+    def timings(self):
+        return self._timings
+
+    def report(self, message_type, contents, origin):
+        self._messages.append(TranspilerMessage(message_type, contents, origin))
+
+    def warn(self, contents, origin):
+        self.report(TranspilerMessage.WARNING, contents, origin)
+
+    def error(self, contents, origin):
+        self.report(TranspilerMessage.ERROR, contents, origin)
 
     def _compile_expression(self, origin, type_ast, value_ast):
         if type_ast is None:
             self.error("member missing type information", origin)
-        else:
-            
-
-    def _compile_code(self, this_obj, is_create_event, ast, comment):
+            return None
+        if value_ast is None:
+            return None
+        return self._expression_gml(value_ast)
+
+    def _expression_gml(self, root):
+        """
+        the GML for an expression, or None (having reported why) when it cannot be written in GML
+
+        the expression is written with an explicit stack, a long chain of operators being as deep a tree as it is
+        long
+        """
+        # the GML of each operand written so far, None for those that cannot be written
+        written = []
+        # (node, whether its operands have been written)
+        stack = [(root, False)]
+        while len(stack) > 0:
+            node, operands_written = stack.pop()
+            operands = _gml_operands(node)
+            if operands is None:
+                self.error("{} cannot be written as a GML value".format(node), node.origin)
+                written.append(None)
+            elif not operands_written and len(operands) > 0:
+                stack.append((node, True))
+                stack.extend((operand, False) for operand in reversed(operands))
+            else:
+                first = len(written) - len(operands)
+                operands_gml = written[first:]
+                del written[first:]
+                written.append(None if None in operands_gml else _node_gml(node, operands, operands_gml))
+        return written[0]
+
+    def _compile_code(self, is_create_event, ast, comment):
         result = "///{}\n".format(comment)
         result += "// automatically generated by mog\n"
 
         if is_create_event:
             result += "\n// initialising member variables\n"
-            for member_name in this_obj.member_names:
-                member_info = this_obj.member_info(member_name)
-                expression = self._compile_expression(member_info.origin, member_info.ast.type, member_info.ast.value)
+            for member_name, origin, type_ast, expression_ast in self._job.members:
+                expression = self._compile_expression(origin, type_ast, expression_ast)
                 if expression is not None:
                     result += "{} = {}\n".format(
                         member_name, expression
@@ -342,37 +823,95 @@ class Transpiler(object):
 
         return result
 
-    def _compile_object(self, obj, gm_project):
-        gm_object = gm_project.create_or_fetch_object(obj.name)
-        for event_name in obj.event_names:
-            event_decl = obj.event_info(event_name)
-            if event_name not in EVENT_NAME_MAPPING:
-                self.error("'{}' is not a valid event name".format(event_name), event_decl.origin)
-                continue
-            event_type, event_number = EVENT_NAME_MAPPING[event_name]
-            gm_event = gm_object.create_or_fetch_event(event_type, event_number)
-            code = self._compile_code(obj, event_name == "create", event_decl.ast.code_block, event_name)
-            gm_event.set_code_action(code)
-        gm_object.save()
-
-    def _compile_objects(self, gm_project):
-        for obj in self._types.values():
-            if not isinstance(obj, ObjectType):
-                continue
-            self._compile_object(obj, gm_project)
+    def run(self):
+        job = self._job
+        timings = self._timings
+        with timings.phase('gm-object-loading'):
+            if job.gm_path is None:
+                gm_object = gamemaker.project.GameObject.from_name(job.base_path, job.name)
+            else:
+                gm_object = gamemaker.project.GameObject.from_path(job.name, job.gm_path)
+        for event_name, event_type, event_number, code_block in job.events:
+            with timings.phase('gml-generation'):
+                code = self._compile_code(event_name == "create", code_block, event_name)
+            with timings.phase('xml-mutation'):
+                gm_event = gm_object.create_or_fetch_event(event_type, event_number)
+                gm_event.set_code_action(code)
+            timings.count('gml-generation', 'events')
+        with timings.phase('gm-object-saving'):
+            written = gm_object.save()
+        timings.count('gm-object-saving', 'characters', written)
+        return self._messages
 
-    def compile(self, gm_project):
-        try:
-            self.identify_types_in(self._ast)
-            self._trigger_delays('object-parenting', self)
-            self._compile_objects(gm_project)
-        except FatalTranspilerError as err:
-            self._fatal_error(err.contents, err.origin)
 
-    def debug_types(self):
-        print("debug transpiler type information:")
-        for info in self._types.values():
-            print("  {}".format(info))
+def _gml_operands(node):
+    """the nodes the GML of an expression node is written from, in order, or None when it cannot be written"""
+    if isinstance(node, (astree.NumericLiteralNode, astree.StringLiteralNode, astree.IdentifierNode)):
+        return []
+    elif isinstance(node, astree.FunctionCall):
+        return node.children[0].children if len(node.children) > 0 else []
+    elif isinstance(node, astree.IndexNode):
+        if node.target is None or node.index is None:
+            return None
+        return [node.target, node.index]
+    elif isinstance(node, astree.OperatorNode) and len(node.children) == node.operand_count:
+        return node.children
+    return None
+
+
+def _node_gml(node, operands, operands_gml):
+    """the GML of an expression node, given that of each of its operands (see _gml_operands)"""
+    if isinstance(node, astree.NumericLiteralNode):
+        return node.value
+    elif isinstance(node, astree.StringLiteralNode):
+        return '"{}"'.format(node.value)
+    elif isinstance(node, astree.IdentifierNode):
+        return node.name
+    elif isinstance(node, astree.FunctionCall):
+        return "{}({})".format(node.function_name, ", ".join(operands_gml))
+    elif isinstance(node, astree.IndexNode):
+        target_gml, index_gml = operands_gml
+        if _needs_parentheses(node.target, node, False):
+            target_gml = "({})".format(target_gml)
+        return "{}[{}]".format(target_gml, index_gml)
+    operands_gml = [
+        "({})".format(gml) if _needs_parentheses(operand, node, position > 0) else gml
+        for position, (operand, gml) in enumerate(zip(operands, operands_gml))
+    ]
+    if node.operand_count == 1:
+        return node.operator + operands_gml[0]
+    elif node.operator == '.':
+        return "{}.{}".format(*operands_gml)
+    return "{} {} {}".format(operands_gml[0], node.operator, operands_gml[1])
+
+
+def _needs_parentheses(operand, operator, is_right):
+    """whether operand has to be parenthesised to stay an operand of operator (or the target of an index) in GML"""
+    if isinstance(operand, astree.NumericLiteralNode):
+        # folding can leave negative literals
+        return operand.value.startswith('-')
+    if not isinstance(operand, astree.OperatorNode):
+        return False
+    if isinstance(operator, astree.IndexNode):
+        # only a member access binds as tightly as the indexing
+        return operand.priority < INDEX_PRIORITY
+    if operator.operand_count == 1:
+        # also keeps - -x from reading as the decrement operator
+        return operand.operand_count == 1 or operand.priority < operator.priority
+    return operand.priority < operator.priority or (is_right and operand.priority == operator.priority)
+
+
+def run_code_job(job):
+    """
+    runs a CodeGenerator for job, returning its messages and timings, a fatal error ends only this object's
+    generation
+    """
+    generator = CodeGenerator(job)
+    try:
+        generator.run()
+    except FatalTranspilerError as err:
+        generator.report(TranspilerMessage.FATAL_ERROR, err.contents, err.origin)
+    return generator.messages, generator.timings
 
 
 EVENT_NAME_MAPPING = {
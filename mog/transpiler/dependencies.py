@@ -0,0 +1,177 @@
+"""
+this module provides the dependency graph between objects, which drives incremental compilation
+"""
+
+
+from ..source import ast as astree
+
+
+INHERITS = 'inherits'
+CALLS = 'calls'
+REFERENCES = 'references'
+
+
+class DependencyGraph(object):
+    """
+    for each object, the structural hash of its declaration and the objects it depends on (and how)
+
+    objects are kept by name rather than symbol ID, since the graph of one build is compared against the graph of
+    the build before it, which was saved to disk. version is the transpiler version (and optimization level) that
+    built it, the graph of a different version says nothing about what the current one would generate
+    """
+
+    def __init__(self, version):
+        self._version = version
+        self._hashes = {}
+        self._dependencies = {}
+        self._removed = {}
+        self._dependents = None
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def object_names(self):
+        return self._hashes.keys()
+
+    def add_object(self, name, declaration_hash):
+        self._hashes[name] = declaration_hash
+        self._dependencies.setdefault(name, {})
+        self._dependents = None
+
+    def add_dependency(self, name, dependency_name, kind):
+        """records that name depends on dependency_name, INHERITS taking priority over CALLS over REFERENCES"""
+        if name == dependency_name:
+            return
+        dependencies = self._dependencies.setdefault(name, {})
+        existing = dependencies.get(dependency_name)
+        if existing is None or _KIND_PRIORITY[kind] < _KIND_PRIORITY[existing]:
+            dependencies[dependency_name] = kind
+        self._dependents = None
+
+    def declaration_hash(self, name):
+        return self._hashes.get(name)
+
+    def set_removed(self, name, removed):
+        """
+        records the names of what was left out of the generated code of name (see mog.transpiler.usage), which
+        depends on the code of other objects as well as its own declaration
+        """
+        self._removed[name] = sorted(removed)
+
+    def removed(self, name):
+        return self._removed.get(name, [])
+
+    def dependencies(self, name):
+        """the objects name depends on, mapped to the kind of each dependency"""
+        return self._dependencies.get(name, {})
+
+    def dependents(self, name):
+        """the objects directly depending on name"""
+        if self._dependents is None:
+            self._dependents = {}
+            for dependent, dependencies in self._dependencies.items():
+                for dependency in dependencies:
+                    self._dependents.setdefault(dependency, set()).add(dependent)
+        return self._dependents.get(name, set())
+
+    def changed_objects(self, previous):
+        """
+        the objects that are new, or whose declaration or what was left out of their code changed, since the
+        previous graph
+        """
+        return {
+            name
+            for name, declaration_hash in self._hashes.items()
+            if previous.declaration_hash(name) != declaration_hash or previous.removed(name) != self.removed(name)
+        }
+
+    def affected_objects(self, previous, changed):
+        """
+        the objects of this graph to regenerate given the changed objects (which may include removed ones): the
+        changed objects and everything depending on them, directly or not, by the dependencies of either graph
+        """
+        affected = set()
+        stack = list(changed)
+        while len(stack) > 0:
+            name = stack.pop()
+            if name in affected:
+                continue
+            affected.add(name)
+            stack.extend(self.dependents(name))
+            stack.extend(previous.dependents(name))
+        return affected & set(self._hashes)
+
+    def to_json(self):
+        return {
+            'version': self._version,
+            'objects': {
+                name: {
+                    'hash': self._hashes[name],
+                    'dependencies': self._dependencies.get(name, {}),
+                    'removed': self.removed(name),
+                }
+                for name in self._hashes
+            },
+        }
+
+    @staticmethod
+    def from_json(data):
+        graph = DependencyGraph(data['version'])
+        for name, entry in data['objects'].items():
+            graph.add_object(name, entry['hash'])
+            graph.set_removed(name, entry.get('removed', []))
+            for dependency_name, kind in entry['dependencies'].items():
+                graph.add_dependency(name, dependency_name, kind)
+        return graph
+
+
+_KIND_PRIORITY = {
+    INHERITS: 0,
+    CALLS: 1,
+    REFERENCES: 2,
+}
+
+
+class DependencyCollector(astree.Visitor):
+    """
+    collects the dependencies of one object from its declaration
+
+    types is the transpiler's type table and method_declarers maps method symbols to the objects declaring a
+    method of that name. an identifier or type naming another object is a reference to it, calling a function
+    named like a method of other objects is taken as a call into all of them, since calls are not yet resolved
+    to the object they are made on
+    """
+
+    def __init__(self, graph, obj, types, method_declarers):
+        super().__init__()
+        self._graph = graph
+        self._obj = obj
+        self._types = types
+        self._method_declarers = method_declarers
+
+    def _reference(self, symbol):
+        referenced = self._types.get(symbol)
+        if referenced is not None and referenced is not self._obj:
+            self._graph.add_dependency(self._obj.name, referenced.name, REFERENCES)
+
+    def visit_IdentifierNode(self, node):
+        self._reference(node.name_symbol)
+
+    def visit_TypeNode(self, node):
+        self._reference(node.name_symbol)
+
+    def visit_FunctionCall(self, node):
+        symbol = node.function_name_symbol
+        self._reference(symbol)
+        if self._obj.method_declared_by(symbol) is None:
+            for declarer in self._method_declarers.get(symbol, ()):
+                self._graph.add_dependency(self._obj.name, declarer.name, CALLS)
+
+    def collect(self):
+        graph = self._graph
+        graph.add_object(self._obj.name, self._obj.ast.structural_hash.hex())
+        if self._obj.parent is not None:
+            graph.add_dependency(self._obj.name, self._obj.parent.name, INHERITS)
+        self.walk(self._obj.ast)
@@ -0,0 +1,182 @@
+"""
+this module provides constant folding and algebraic simplification of expressions, following GML's semantics
+"""
+
+
+from ..source import ast as astree
+import math
+
+
+# GML takes a real to be true when it is greater than 0.5, and gives 1 for true and 0 for false
+def _truth(value):
+    return value > 0.5
+
+
+def _real(condition):
+    return 1.0 if condition else 0.0
+
+
+def _number(node):
+    if isinstance(node, astree.NumericLiteralNode):
+        return float(node.value)
+    return None
+
+
+def _string(node):
+    if isinstance(node, astree.StringLiteralNode):
+        return node.value
+    return None
+
+
+def _number_text(value):
+    """the literal for value, or None where GML has no plain literal for it (infinities, exponents)"""
+    if not math.isfinite(value):
+        return None
+    if value.is_integer() and abs(value) < 2 ** 53:
+        return str(int(value))
+    text = repr(value)
+    if 'e' in text:
+        return None
+    return text
+
+
+def _fold_numbers(operator, left, right):
+    """the value of left operator right, or None when it should be left to run time"""
+    if operator == '+':
+        return left + right
+    elif operator == '-':
+        return left - right
+    elif operator == '*':
+        return left * right
+    elif operator == '/':
+        return left / right if right != 0 else None
+    elif operator in ('&&', '||'):
+        if operator == '&&':
+            return _real(_truth(left) and _truth(right))
+        return _real(_truth(left) or _truth(right))
+    # GML compares reals within an epsilon that can be changed at run time, whole numbers are always at least 1
+    # apart, so comparing them comes out the same whatever it is set to
+    elif not left.is_integer() or not right.is_integer():
+        return None
+    elif operator == '==':
+        return _real(left == right)
+    elif operator == '!=':
+        return _real(left != right)
+    elif operator == '<':
+        return _real(left < right)
+    elif operator == '>':
+        return _real(left > right)
+    elif operator == '<=':
+        return _real(left <= right)
+    elif operator == '>=':
+        return _real(left >= right)
+    return None
+
+
+def _fold_strings(origin, operator, left, right):
+    if operator == '+':
+        return astree.StringLiteralNode(origin, left + right)
+    # literals are compared as written, which is only their value when there are no escapes in them
+    if '\\' in left or '\\' in right:
+        return None
+    if operator == '==':
+        return _number_node(origin, _real(left == right))
+    elif operator == '!=':
+        return _number_node(origin, _real(left != right))
+    return None
+
+
+def _number_node(origin, value):
+    text = _number_text(value)
+    if text is None:
+        return None
+    return astree.NumericLiteralNode(origin, text)
+
+
+def _is_negation(node):
+    return isinstance(node, astree.OperatorNode) and node.operator == '-' and len(node.children) == 1
+
+
+def _simplify_unary(node):
+    operand = node.children[0]
+    value = _number(operand)
+    if value is not None:
+        if node.operator == '-':
+            return _number_node(node.origin, -value)
+        elif node.operator == '!':
+            return _number_node(node.origin, _real(not _truth(value)))
+    elif node.operator == '-' and _is_negation(operand):
+        # -(-x) is x
+        return operand.children[0]
+    return None
+
+
+def _simplify_binary(node):
+    operator = node.operator
+    left, right = node.children
+    left_value = _number(left)
+    right_value = _number(right)
+    if left_value is not None and right_value is not None:
+        value = _fold_numbers(operator, left_value, right_value)
+        return _number_node(node.origin, value) if value is not None else None
+
+    left_string = _string(left)
+    right_string = _string(right)
+    if left_string is not None and right_string is not None:
+        return _fold_strings(node.origin, operator, left_string, right_string)
+
+    # identities, only applied to values that are not literal strings, since the arithmetic they drop would be
+    # an error on a string rather than leave it as it is
+    if left_string is None and right_string is None:
+        if right_value == 1 and operator in ('*', '/'):
+            return left
+        elif right_value == 0 and operator in ('+', '-'):
+            return left
+        elif left_value == 1 and operator == '*':
+            return right
+        elif left_value == 0 and operator == '+':
+            return right
+    return None
+
+
+def simplify(node):
+    """
+    the simplified form of a single operator node whose operands are already simplified, or the node itself
+
+    constant arithmetic, comparisons, logic and string concatenation are evaluated as GML would at run time, and
+    multiplying or dividing by 1 and adding or subtracting 0 are dropped. a result GML could not write as a
+    literal, or that could differ at run time (division by zero, comparing fractions), is left as it is
+    """
+    if not isinstance(node, astree.OperatorNode):
+        return node
+    result = None
+    if node.operand_count == 1 and len(node.children) == 1:
+        result = _simplify_unary(node)
+    elif node.operand_count == 2 and len(node.children) == 2 and node.operator != '.':
+        result = _simplify_binary(node)
+    return result if result is not None else node
+
+
+def fold(root):
+    """
+    simplifies every operator in the tree under root in place (root itself is kept), returning how many were
+    simplified away
+
+    children are simplified before their parents, so constants fold all the way up an expression. like add, the
+    replacements only clear the structural hashes of the nodes whose children are replaced
+    """
+    count = 0
+    stack = [(root, False)]
+    while len(stack) > 0:
+        node, children_done = stack.pop()
+        children = node.children
+        if not children_done:
+            stack.append((node, True))
+            stack.extend((child, False) for child in children)
+            continue
+        for index, child in enumerate(children):
+            simplified = simplify(child)
+            if simplified is not child:
+                node.replace(index, simplified)
+                count += 1
+    return count
@@ -0,0 +1,206 @@
+"""
+this module provides the pass manager, which orders and runs the passes of the transpiler
+"""
+
+
+import contextlib
+
+
+class PassError(Exception):
+    pass
+
+
+class Pass(object):
+    """
+    a named step of compilation
+
+    function is called as function(transpiler, results), results mapping the names of the pass's inputs to their
+    values, and returns a dict of the values of its outputs (an output it leaves out is recorded as True, for
+    passes whose output is only that they have run). optional_inputs are results the pass uses when they are
+    produced at the optimization level being run, but does not need, they are None in results otherwise.
+    invalidates names the results the pass makes stale, such as analyses of code it rewrites, and opt_level is
+    the lowest optimization level the pass runs at
+    """
+
+    def __init__(self, name, function, inputs=(), outputs=(), invalidates=(), opt_level=0, optional_inputs=()):
+        self._name = name
+        self._function = function
+        self._inputs = tuple(inputs)
+        self._optional_inputs = tuple(optional_inputs)
+        self._outputs = tuple(outputs)
+        self._invalidates = tuple(invalidates)
+        self._opt_level = opt_level
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def function(self):
+        return self._function
+
+    @property
+    def inputs(self):
+        return self._inputs
+
+    @property
+    def optional_inputs(self):
+        return self._optional_inputs
+
+    @property
+    def outputs(self):
+        return self._outputs
+
+    @property
+    def invalidates(self):
+        return self._invalidates
+
+    @property
+    def opt_level(self):
+        return self._opt_level
+
+    def __str__(self):
+        return "pass '{}'".format(self.name)
+
+
+class PassManager(object):
+    """
+    runs passes in an order where every pass comes after the passes producing its inputs
+
+    the order is worked out from the inputs (optional ones included) and outputs the passes declare, passes not
+    ordered by them keep the order they were added in. the passes scheduled at an optimization level are those
+    whose opt_level is no higher, their inputs are always produced though, a pass that is not scheduled still
+    runs if a scheduled one needs its output, while an optional input is only produced if its producer is
+    scheduled. results are cached across passes (and across runs, until reset), a pass whose outputs are
+    all cached is not run again, and a result a pass invalidates is produced afresh the next time it is needed.
+    given a Timings, each pass run is timed as a phase named after it
+    """
+
+    def __init__(self):
+        self._passes = []
+        self._producers = {}
+        self._order = None
+        self._results = {}
+        self._provided = set()
+        self._run_passes = []
+        self._opt_level = 0
+        self._timings = None
+
+    @property
+    def passes(self):
+        return list(self._passes)
+
+    @property
+    def run_passes(self):
+        """the names of the passes run by the last run, in the order they ran"""
+        return self._run_passes
+
+    def add(self, compiler_pass):
+        if any(existing.name == compiler_pass.name for existing in self._passes):
+            raise PassError("there is already a pass named '{}'".format(compiler_pass.name))
+        for output in compiler_pass.outputs:
+            if output in self._producers:
+                raise PassError("'{}' is produced by both {} and {}".format(
+                    output, self._producers[output], compiler_pass
+                ))
+        self._passes.append(compiler_pass)
+        for output in compiler_pass.outputs:
+            self._producers[output] = compiler_pass
+        self._order = None
+
+    def order(self):
+        """the passes in the order they run, raising PassError for a dependency cycle"""
+        if self._order is None:
+            positions = {compiler_pass.name: index for index, compiler_pass in enumerate(self._passes)}
+            dependencies = {}
+            for compiler_pass in self._passes:
+                dependencies[compiler_pass.name] = {
+                    self._producers[name].name
+                    for name in compiler_pass.inputs + compiler_pass.optional_inputs
+                    if name in self._producers and self._producers[name] is not compiler_pass
+                }
+            order = []
+            done = set()
+            while len(order) < len(self._passes):
+                ready = [
+                    compiler_pass
+                    for compiler_pass in self._passes
+                    if compiler_pass.name not in done and dependencies[compiler_pass.name] <= done
+                ]
+                if len(ready) == 0:
+                    raise PassError("passes depend on each other in a cycle: {}".format(", ".join(
+                        compiler_pass.name for compiler_pass in self._passes if compiler_pass.name not in done
+                    )))
+                first = min(ready, key=lambda compiler_pass: positions[compiler_pass.name])
+                order.append(first)
+                done.add(first.name)
+            self._order = order
+        return self._order
+
+    def result(self, name, default=None):
+        return self._results.get(name, default)
+
+    def is_cached(self, name):
+        return name in self._results
+
+    def provide(self, name, value):
+        """supplies a result from outside any pass, e.g. the project being compiled into"""
+        self._results[name] = value
+        self._provided.add(name)
+
+    def invalidate(self, name):
+        if name not in self._provided:
+            self._results.pop(name, None)
+
+    def reset(self):
+        """drops every cached result, including provided ones"""
+        self._results = {}
+        self._provided = set()
+
+    def _ensure(self, name, transpiler, producing):
+        if name in self._results:
+            return
+        producer = self._producers.get(name)
+        if producer is None:
+            raise PassError("nothing produces '{}'".format(name))
+        if producer.name in producing:
+            raise PassError("{} needs its own output '{}'".format(producer, name))
+        self._run(producer, transpiler, producing)
+
+    def _run(self, compiler_pass, transpiler, producing=frozenset()):
+        producing = producing | {compiler_pass.name}
+        for name in compiler_pass.inputs:
+            self._ensure(name, transpiler, producing)
+        for name in compiler_pass.optional_inputs:
+            producer = self._producers.get(name)
+            if producer is not None and producer.opt_level <= self._opt_level:
+                self._ensure(name, transpiler, producing)
+        inputs = {name: self._results[name] for name in compiler_pass.inputs}
+        for name in compiler_pass.optional_inputs:
+            inputs[name] = self._results.get(name)
+        if self._timings is not None:
+            timed = self._timings.phase(compiler_pass.name)
+        else:
+            timed = contextlib.nullcontext()
+        with timed:
+            outputs = compiler_pass.function(transpiler, inputs) or {}
+        self._run_passes.append(compiler_pass.name)
+        for name in compiler_pass.invalidates:
+            self.invalidate(name)
+        for name in compiler_pass.outputs:
+            self._results[name] = outputs.get(name, True)
+
+    def run(self, transpiler, opt_level=0, timings=None):
+        """runs the passes scheduled at opt_level, along with any pass producing a result they need"""
+        self._run_passes = []
+        self._opt_level = opt_level
+        self._timings = timings
+        try:
+            for compiler_pass in self.order():
+                if compiler_pass.opt_level > opt_level:
+                    continue
+                if len(compiler_pass.outputs) > 0 and all(name in self._results for name in compiler_pass.outputs):
+                    continue
+                self._run(compiler_pass, transpiler)
+        finally:
+            self._timings = None
@@ -0,0 +1,172 @@
+"""
+this module provides the usage analysis of members and methods, which finds those whose code need not be generated
+"""
+
+
+from .. import gamemaker
+from ..source import ast as astree
+
+
+class _UsageCollector(astree.Visitor):
+    """collects the names read and the functions called by one piece of code, as symbol IDs"""
+
+    def __init__(self):
+        super().__init__()
+        self._reads = set()
+        self._calls = set()
+        # names read or called after a '.', on an instance of any object
+        self._qualified_reads = set()
+        self._qualified_calls = set()
+
+    def visit_IdentifierNode(self, node):
+        self._reads.add(node.name_symbol)
+
+    def visit_FunctionCall(self, node):
+        self._calls.add(node.function_name_symbol)
+
+    def visit_AssignmentNode(self, node):
+        # a compound assignment reads its destination first
+        if node.destination_symbol is not None and node.operator != '=':
+            self._reads.add(node.destination_symbol)
+
+    def visit_OperatorNode(self, node):
+        if node.operator == '.' and len(node.children) == 2:
+            accessed = node.children[1]
+            # the name accessed may be indexed, as in a.b[0], whichever way round the tree was built
+            while isinstance(accessed, astree.IndexNode) and accessed.target is not None:
+                accessed = accessed.target
+            if isinstance(accessed, astree.IdentifierNode):
+                self._qualified_reads.add(accessed.name_symbol)
+            elif isinstance(accessed, astree.FunctionCall):
+                self._qualified_calls.add(accessed.function_name_symbol)
+
+    @property
+    def reads(self):
+        return self._reads
+
+    @property
+    def calls(self):
+        return self._calls
+
+    @property
+    def qualified_reads(self):
+        return self._qualified_reads
+
+    @property
+    def qualified_calls(self):
+        return self._qualified_calls
+
+
+def _has_calls(node):
+    stack = [node]
+    while len(stack) > 0:
+        node = stack.pop()
+        if isinstance(node, astree.FunctionCall):
+            return True
+        stack.extend(node.children)
+    return False
+
+
+class UsageAnalysis(object):
+    """
+    finds the members that are never read and the methods that are never called, across every object
+
+    an object's code runs on instances of the object and of each of its descendants, and GML looks instance
+    variables up by name, so a name read by an object's code reads the member of that name declared by the object,
+    by any ancestor or by any descendant, and likewise for calls. a name read or called after a '.' may be on an
+    instance of any object, as may a call to a function no related object has a method for. events are always
+    run, a member or method is used once live code reads or calls it, and a member's initializer is live along
+    with the member, or always when it calls anything (which may have side effects) or the member is one of game
+    maker's built in instance variables
+    """
+
+    def __init__(self, objects):
+        self._objects = list(objects)
+        self._member_declarers = {}
+        self._method_declarers = {}
+        for obj in self._objects:
+            for symbol in obj.member_symbols:
+                self._member_declarers.setdefault(symbol, []).append(obj)
+            for symbol in obj.method_symbols:
+                self._method_declarers.setdefault(symbol, []).append(obj)
+        self._kept_initializers = set()
+        self._read_members = set()
+        self._called_methods = set()
+        # (object, code) pairs of live code still to be scanned
+        self._pending = []
+
+    @staticmethod
+    def _is_ancestor(ancestor, obj):
+        obj = obj.parent
+        while obj is not None:
+            if obj is ancestor:
+                return True
+            obj = obj.parent
+        return False
+
+    def _related(self, obj, other):
+        return obj is other or self._is_ancestor(obj, other) or self._is_ancestor(other, obj)
+
+    def _read_member(self, declarer, symbol):
+        key = (declarer, symbol)
+        if key not in self._read_members:
+            self._read_members.add(key)
+            expression = declarer.member_info(symbol).ast.expression
+            if expression is not None and key not in self._kept_initializers:
+                self._pending.append((declarer, expression))
+
+    def _call_method(self, declarer, symbol):
+        key = (declarer, symbol)
+        if key not in self._called_methods:
+            self._called_methods.add(key)
+            self._pending.append((declarer, declarer.method_info(symbol).ast))
+
+    def _scan(self, obj, code):
+        collector = _UsageCollector()
+        collector.walk(code)
+        for symbol in collector.reads:
+            for declarer in self._member_declarers.get(symbol, ()):
+                if self._related(obj, declarer):
+                    self._read_member(declarer, symbol)
+        for symbol in collector.qualified_reads:
+            for declarer in self._member_declarers.get(symbol, ()):
+                self._read_member(declarer, symbol)
+        for symbol in collector.calls:
+            declarers = self._method_declarers.get(symbol, ())
+            related = [declarer for declarer in declarers if self._related(obj, declarer)]
+            for declarer in related if len(related) > 0 else declarers:
+                self._call_method(declarer, symbol)
+        for symbol in collector.qualified_calls:
+            for declarer in self._method_declarers.get(symbol, ()):
+                self._call_method(declarer, symbol)
+
+    def run(self):
+        for obj in self._objects:
+            for symbol in obj.event_symbols:
+                self._pending.append((obj, obj.event_info(symbol).ast))
+            for symbol in obj.member_symbols:
+                member_info = obj.member_info(symbol)
+                expression = member_info.ast.expression
+                if expression is None:
+                    continue
+                if member_info.name in gamemaker.project.BUILT_IN_INSTANCE_VARIABLES or _has_calls(expression):
+                    self._kept_initializers.add((obj, symbol))
+                    self._pending.append((obj, expression))
+        while len(self._pending) > 0:
+            obj, code = self._pending.pop()
+            self._scan(obj, code)
+        return self
+
+    def unread_members(self, obj):
+        """the symbols of the members obj declares whose initialization can be left out, in declaration order"""
+        return [
+            symbol
+            for symbol in obj.member_symbols
+            if (obj, symbol) not in self._read_members
+            and (obj, symbol) not in self._kept_initializers
+            and obj.member_info(symbol).ast.expression is not None
+        ]
+
+    def uncalled_methods(self, obj):
+        """the symbols of the methods obj declares that are never called, in declaration order"""
+        return [symbol for symbol in obj.method_symbols if (obj, symbol) not in self._called_methods]
@@ -0,0 +1,130 @@
+import mog
+import os
+import re
+import shutil
+import tempfile
+import unittest
+import xml.sax.saxutils
+
+
+SOURCE = """
+object objA {{
+{members}    event step {{ {step} total = {reads}; }}
+    event create {{ }}
+}}
+
+object objB {{
+    event create {{ }}
+}}
+"""
+
+
+# (expression, the GML it is initialized with once folded)
+FOLDING = [
+    ("1 + 2 * 3", "7"),
+    ("7 / 2", "3.5"),
+    ("1 / 0", "1 / 0"),
+    ("2 - 5", "-3"),
+    # GML takes reals greater than 0.5 to be true
+    ("0.6 && 1", "1"),
+    ("0.5 && 1", "0"),
+    ("0.4 || 0", "0"),
+    ("0.4 || 0.6", "1"),
+    ("!0.5", "1"),
+    ("!0.6", "0"),
+    # comparisons are only folded between whole numbers
+    ("2 == 2", "1"),
+    ("2 != 2", "0"),
+    ("2 < 3", "1"),
+    ("3 >= 4", "0"),
+    ("1.5 < 2", "1.5 < 2"),
+    ("0.1 + 0.2 == 0.3", "0.30000000000000004 == 0.3"),
+    # literal strings are compared as written, so not when they hold escapes
+    ('"a" + "b"', '"ab"'),
+    ('"a" == "a"', "1"),
+    ('"a" != "b"', "1"),
+    ('"a\\n" == "a\\n"', '"a\\n" == "a\\n"'),
+    # identities, which are not applied to literal strings
+    ("y * 1", "y"),
+    ("1 * y", "y"),
+    ("y / 1", "y"),
+    ("y + 0", "y"),
+    ("0 + y", "y"),
+    ("y - 0", "y"),
+    ("0 - y", "0 - y"),
+    ('"s" + 0', '"s" + 0'),
+    # negations, and the negative literals folding leaves, which are parenthesised as operands
+    ("-(-y)", "y"),
+    ("-(2 - 5)", "3"),
+    ("y - (0 - 2)", "y - (-2)"),
+    ("(1 - 3) * y", "(-2) * y"),
+    ("-(0 - y)", "-(0 - y)"),
+    # values GML has no plain literal for are left to run time
+    ("100000000 * 100000000 * 100000000", "100000000 * 100000000 * 100000000"),
+]
+
+
+class GenerationTest(unittest.TestCase):
+
+    def setUp(self):
+        self._base_path = tempfile.mkdtemp(suffix=".gmx", prefix="Game")
+        project_path = mog.gamemaker.project.Project.path_from_base(self._base_path)
+        with open(project_path, 'w') as file:
+            file.write("<assets></assets>")
+
+    def tearDown(self):
+        shutil.rmtree(self._base_path)
+
+    def _generate(self, expressions, opt_level=mog.transpiler.DEFAULT_OPT_LEVEL, jobs=1, step=""):
+        """
+        the GML each expression is initialized with, as a member of an object whose step event reads them all
+        (after the given statements), next to another object so more than one job can run across processes
+        """
+        names = ["m{}".format(index) for index in range(len(expressions))]
+        source = SOURCE.format(
+            members="".join(
+                "    member {}: real = {};\n".format(name, expression) for name, expression in zip(names, expressions)
+            ),
+            step=step, reads=" + ".join(names)
+        )
+        result = mog.source.parser.parse_text(source, "test.mog")
+        self.assertFalse(result.has_fatal_error())
+        transpiler = mog.transpiler.Transpiler("test")
+        transpiler.ingest_ast(result.ast)
+        transpiler.compile(mog.gamemaker.project.Project(self._base_path), jobs=jobs, opt_level=opt_level)
+        self.assertTrue(transpiler.is_success(), [str(message) for message in transpiler.messages])
+        with open(os.path.join(self._base_path, "objA.object.gmx")) as file:
+            code = xml.sax.saxutils.unescape(file.read())
+        generated = dict(re.findall(r"^(m\d+) = (.*)$", code, re.MULTILINE))
+        return [generated[name] for name in names]
+
+    def test_long_expression(self):
+        terms = 400
+        generated, = self._generate([" + ".join(["y"] * terms)])
+        self.assertEqual(generated, " + ".join(["y"] * terms))
+
+    def test_deepest_nesting_the_parser_accepts(self):
+        # calls as deeply nested as the parser accepts, and ifs as deep as they can be inside an event
+        depth = mog.source.parser.MAX_NESTING_DEPTH - 1
+        ifs = depth - 2
+        calls = "f(" * depth + "y" + ")" * depth
+        for jobs in (1, 2):
+            generated, = self._generate([calls], jobs=jobs, step="if y {" * ifs + "y = 1;" + "}" * ifs)
+            self.assertEqual(generated, calls)
+
+    def test_index_of_an_operation_keeps_its_parentheses(self):
+        self.assertEqual(self._generate(["(y + z)[0]", "(-y)[0]", "a.b[0]", "(a.b)[0]", "q[y + z]"], opt_level=0), [
+            "(y + z)[0]", "(-y)[0]", "a.b[0]", "a.b[0]", "q[y + z]",
+        ])
+
+    def test_folding(self):
+        generated = self._generate([expression for expression, _ in FOLDING])
+        for (expression, expected), gml in zip(FOLDING, generated):
+            self.assertEqual(gml, expected, expression)
+
+    def test_no_folding_without_optimization(self):
+        self.assertEqual(self._generate(["1 + 2 * 3", "y * 1"], opt_level=0), ["1 + 2 * 3", "y * 1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
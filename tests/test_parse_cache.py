@@ -0,0 +1,77 @@
+import main
+import mog
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+
+# a left-deep tree as long as the expression, and ifs nested as deeply as the parser accepts inside an event
+LONG_EXPRESSION_TERMS = 5000
+NESTED_IFS = mog.source.parser.MAX_NESTING_DEPTH - 2
+
+
+def deep_source():
+    return "object objA {{\n    member x: real = {};\n    event create {{\n{}y = 1;\n{}    }}\n}}\n".format(
+        " + ".join(["1"] * LONG_EXPRESSION_TERMS), "if 1 {\n" * NESTED_IFS, "}\n" * NESTED_IFS
+    )
+
+
+def tree_depth(root):
+    depth = 0
+    stack = [(root, 0)]
+    while len(stack) > 0:
+        node, node_depth = stack.pop()
+        depth = max(depth, node_depth)
+        stack.extend((child, node_depth + 1) for child in node.children)
+    return depth
+
+
+class DeepTreePicklingTest(unittest.TestCase):
+
+    def setUp(self):
+        self._result = mog.source.parser.parse_text(deep_source(), "deep.mog")
+        self.assertFalse(self._result.has_fatal_error())
+        self.assertGreater(tree_depth(self._result.ast), LONG_EXPRESSION_TERMS)
+
+    def _assert_same(self, result):
+        self.assertEqual(result.ast.structural_hash, self._result.ast.structural_hash)
+        self.assertEqual(result.extents, self._result.extents)
+        self.assertEqual(result.lines.text, self._result.lines.text)
+
+    def test_pickle_round_trip(self):
+        self._assert_same(pickle.loads(pickle.dumps(self._result, pickle.HIGHEST_PROTOCOL)))
+
+    def test_parse_cache_round_trip(self):
+        path = tempfile.mkdtemp()
+        try:
+            cache = mog.project.ParseCache(path)
+            key = cache.key("deep.mog", self._result.lines.text)
+            cache.store(key, "deep.mog", self._result)
+            self._assert_same(cache.load(key))
+        finally:
+            shutil.rmtree(path)
+
+
+class ParseFilesAcrossProcessesTest(unittest.TestCase):
+
+    def test_deep_trees_come_back_from_workers(self):
+        path = tempfile.mkdtemp()
+        try:
+            filenames = ["a.mog", "b.mog"]
+            filepaths = [os.path.join(path, filename) for filename in filenames]
+            for filepath in filepaths:
+                with open(filepath, 'w') as file:
+                    file.write(deep_source())
+            parsed = main.parse_files(mog.source.parser.parse_text, filepaths, filenames, 2)
+            expected = mog.source.parser.parse_text(deep_source(), "a.mog").ast.structural_hash
+            for result, _ in parsed:
+                self.assertFalse(result.has_fatal_error())
+                self.assertEqual(result.ast.structural_hash, expected)
+        finally:
+            shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
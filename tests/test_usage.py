@@ -0,0 +1,65 @@
+import mog
+import os
+import shutil
+import tempfile
+import unittest
+
+
+SOURCE = """
+object objB {
+    event step {
+        x = objC.arr2[0] + objC.arr3;
+    }
+}
+
+object objC {
+    member arr2: real = 7;
+    member arr3: real = 8;
+    member unused: real = 9;
+    event create {
+    }
+}
+"""
+
+
+class DeadMemberTest(unittest.TestCase):
+
+    def setUp(self):
+        self._base_path = tempfile.mkdtemp(suffix=".gmx", prefix="Game")
+        project_path = mog.gamemaker.project.Project.path_from_base(self._base_path)
+        with open(project_path, 'w') as file:
+            file.write("<assets></assets>")
+
+    def tearDown(self):
+        shutil.rmtree(self._base_path)
+
+    def _build(self):
+        result = mog.source.parser.parse_text(SOURCE, "test.mog")
+        self.assertTrue(result.is_success())
+        transpiler = mog.transpiler.Transpiler("test")
+        transpiler.ingest_ast(result.ast)
+        transpiler.compile(mog.gamemaker.project.Project(self._base_path))
+        self.assertTrue(transpiler.is_success())
+        with open(os.path.join(self._base_path, "objC.object.gmx")) as file:
+            return transpiler, file.read()
+
+    def test_member_read_through_index_keeps_its_initializer(self):
+        transpiler, generated = self._build()
+        self.assertIn("arr2 = 7", generated)
+        self.assertIn("arr3 = 8", generated)
+        removed = [message.contents for message in transpiler.messages]
+        self.assertFalse(any("'arr2'" in contents for contents in removed))
+
+    def test_compiling_again_reports_only_its_own_objects(self):
+        transpiler, _ = self._build()
+        transpiler.compile(mog.gamemaker.project.Project(self._base_path))
+        self.assertEqual(sorted(transpiler.compiled_objects), ["objB", "objC"])
+
+    def test_unread_member_initializer_is_left_out(self):
+        transpiler, generated = self._build()
+        self.assertNotIn("unused = 9", generated)
+        self.assertTrue(any("'unused'" in message.contents for message in transpiler.messages))
+
+
+if __name__ == '__main__':
+    unittest.main()